@@ -0,0 +1,49 @@
+"""
+Alembic 迁移环境
+
+管理 MySQL 基础库 (users / accounts / contents / teams / devices / tasks)
+的表结构，连接地址取自 settings.MYSQL_DATABASE_URI
+"""
+
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from app.core.config import settings
+from app import models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+
+def run_migrations_offline():
+    """生成SQL脚本，不连接数据库"""
+    context.configure(
+        url=settings.MYSQL_DATABASE_URI,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """直接在数据库上执行迁移"""
+    connectable = create_engine(settings.MYSQL_DATABASE_URI, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,117 @@
+"""对齐ORM模型与初始化脚本，添加查询索引
+
+以 app/db/sql/mysql_init.sql 最初版本建出的库为基线：
+1. contents.schedule_time 改名为 scheduled_time，补充模型中的字段
+2. devices.device_name / last_heartbeat 改名为 name / last_seen
+3. 补建 tasks 表和 teams 缺少的字段
+4. 按服务层的查询条件添加二级索引
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # contents
+    op.alter_column(
+        "contents", "schedule_time",
+        new_column_name="scheduled_time",
+        existing_type=sa.TIMESTAMP(),
+        existing_nullable=True,
+    )
+    op.add_column("contents", sa.Column("content_type", sa.String(50)))
+    op.add_column("contents", sa.Column("platform", sa.String(50)))
+    op.add_column("contents", sa.Column("published_at", sa.TIMESTAMP(), nullable=True))
+    op.add_column("contents", sa.Column("meta_data", sa.JSON()))
+
+    # devices
+    op.alter_column(
+        "devices", "device_name",
+        new_column_name="name",
+        existing_type=sa.String(191),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "devices", "last_heartbeat",
+        new_column_name="last_seen",
+        existing_type=sa.TIMESTAMP(),
+        existing_nullable=True,
+    )
+    op.add_column("devices", sa.Column("is_active", sa.Boolean(), server_default=sa.true()))
+
+    # teams
+    op.add_column("teams", sa.Column("is_active", sa.Boolean(), server_default=sa.true()))
+    op.add_column("teams", sa.Column("config", sa.JSON()))
+
+    # tasks
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(191)),
+        sa.Column("type", sa.String(50)),
+        sa.Column("platform", sa.String(50)),
+        sa.Column("status", sa.String(50), server_default="pending"),
+        sa.Column("config", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="CASCADE")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE")),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+    # 索引
+    op.create_index("ix_contents_account_id_created_at", "contents", ["account_id", "created_at"])
+    op.create_index("ix_contents_user_id_id", "contents", ["user_id", "id"])
+    op.create_index("ix_accounts_user_id_platform", "accounts", ["user_id", "platform"])
+    op.create_index("ix_tasks_name", "tasks", ["name"])
+    op.create_index("ix_tasks_user_id", "tasks", ["user_id"])
+    op.create_index("ix_teams_owner_id", "teams", ["owner_id"])
+    op.create_index("ix_devices_user_id", "devices", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_devices_user_id", table_name="devices")
+    op.drop_index("ix_teams_owner_id", table_name="teams")
+    op.drop_index("ix_accounts_user_id_platform", table_name="accounts")
+    op.drop_index("ix_contents_user_id_id", table_name="contents")
+    op.drop_index("ix_contents_account_id_created_at", table_name="contents")
+
+    op.drop_table("tasks")
+
+    op.drop_column("teams", "config")
+    op.drop_column("teams", "is_active")
+
+    op.drop_column("devices", "is_active")
+    op.alter_column(
+        "devices", "last_seen",
+        new_column_name="last_heartbeat",
+        existing_type=sa.TIMESTAMP(),
+        existing_nullable=True,
+    )
+    op.alter_column(
+        "devices", "name",
+        new_column_name="device_name",
+        existing_type=sa.String(191),
+        existing_nullable=False,
+    )
+
+    op.drop_column("contents", "meta_data")
+    op.drop_column("contents", "published_at")
+    op.drop_column("contents", "platform")
+    op.drop_column("contents", "content_type")
+    op.alter_column(
+        "contents", "scheduled_time",
+        new_column_name="schedule_time",
+        existing_type=sa.TIMESTAMP(),
+        existing_nullable=True,
+    )
@@ -0,0 +1,38 @@
+"""设备配置版本号和配置历史
+
+1. devices 增加 config_version，每次修改配置加1
+2. 新建 device_config_versions 保存最近的配置版本，用于生成增量配置
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "devices",
+        sa.Column("config_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "device_config_versions",
+        sa.Column("device_id", sa.Integer(), sa.ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("version", sa.Integer(), primary_key=True),
+        sa.Column("config", sa.JSON()),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.now()),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+
+
+def downgrade():
+    op.drop_table("device_config_versions")
+    op.drop_column("devices", "config_version")
@@ -2,14 +2,27 @@
 API依赖模块
 """
 
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Any, AsyncGenerator, Generator, Optional, Union
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.db.session import get_mysql_db, get_postgres_db, SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import (
+    get_postgres_db,
+    get_async_postgres_db,
+    MySQLSessionLocal,
+    AsyncMySQLSessionLocal,
+    SessionLocal
+)
+from app.db.routing import replica_router, read_your_writes
 from app.core.config import settings
-from app import models
+from app.core.security import decode_device_token
+from app import models, schemas
+from app.cache.principal import principal_cache
+from app.core.ratelimit import client_ip, rate_limiter
+from app.cache.idempotency import IdempotentRequest, idempotency_store, request_fingerprint
 from app.schemas.common import ResponseModel
 import logging
 
@@ -19,6 +32,12 @@ oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
+# 不要求登录的接口 (如限流) 使用，未携带token时为None
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login",
+    auto_error=False
+)
+
 def get_db() -> Generator:
     """获取默认数据库会话"""
     try:
@@ -27,6 +46,84 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def _token_subject(token: Optional[str]) -> Optional[str]:
+    """解析token中的用户id，无效时返回None"""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except jwt.JWTError:
+        return None
+    if payload.get("typ") == "device":
+        return None
+    return payload.get("sub")
+
+async def _mark_writes(request: Request, db: Any) -> None:
+    """会话有写入时，为当前用户开启读己之写窗口"""
+    user_id = getattr(request.state, "user_id", None)
+    if db.info.get("has_writes") and user_id is not None:
+        await read_your_writes.mark(user_id)
+
+class BatchContext:
+    """/batch 子请求共享的认证用户和读库选择
+
+    会话不在子请求间共享：同步会话的依赖和路由在线程池中执行，
+    并发的子请求会在不同线程中使用同一个会话，因此每个子请求单独创建会话
+    """
+
+    def __init__(self, user: Any, use_primary: bool):
+        self.user = user
+        self.use_primary = use_primary
+
+def _batch_context(request: Request) -> Optional[BatchContext]:
+    return getattr(request.state, "batch", None)
+
+async def _use_primary_for_reads(token: Optional[str]) -> bool:
+    if not replica_router.enabled:
+        return True
+    return await read_your_writes.is_sticky(_token_subject(token))
+
+async def get_mysql_db(request: Request) -> AsyncGenerator[Session, None]:
+    """获取MySQL主库会话"""
+    db = MySQLSessionLocal()
+    try:
+        yield db
+        await _mark_writes(request, db)
+    finally:
+        db.close()
+
+async def get_async_mysql_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """获取MySQL主库异步会话"""
+    async with AsyncMySQLSessionLocal() as db:
+        yield db
+        await _mark_writes(request, db)
+
+async def get_mysql_read_db(
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+) -> AsyncGenerator[Session, None]:
+    """获取MySQL只读会话，优先使用只读副本"""
+    batch = _batch_context(request)
+    use_primary = batch.use_primary if batch is not None else await _use_primary_for_reads(token)
+    db = replica_router.session(use_primary=use_primary)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_mysql_read_db(
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+) -> AsyncGenerator[AsyncSession, None]:
+    """获取MySQL只读异步会话，优先使用只读副本"""
+    batch = _batch_context(request)
+    use_primary = batch.use_primary if batch is not None else await _use_primary_for_reads(token)
+    db = replica_router.async_session(use_primary=use_primary)
+    async with db:
+        yield db
+
 async def get_analytics_dbs(
     mysql_db: Session = Depends(get_mysql_db),
     postgres_db: Session = Depends(get_postgres_db)
@@ -35,10 +132,21 @@ async def get_analytics_dbs(
     return mysql_db, postgres_db
 
 async def get_current_user(
-    db: Session = Depends(get_mysql_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_mysql_read_db),
     token: str = Depends(oauth2_scheme)
-) -> models.User:
-    """获取当前用户"""
+) -> Union[models.User, schemas.UserPrincipal]:
+    """获取当前用户
+
+    开启 PRINCIPAL_CACHE_SKIP_DB 时，缓存命中返回 UserPrincipal 快照
+    (仅含 id/is_active/is_superuser)，否则返回数据库中的用户对象
+    /batch 的子请求直接使用批量请求已认证的用户
+    """
+    batch = _batch_context(request)
+    if batch is not None:
+        request.state.user_id = batch.user.id
+        return batch.user
+
     # 定义一个HTTPException，当无法验证凭证时抛出
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,17 +160,112 @@ async def get_current_user(
         )
         # 从payload中获取用户id
         user_id: int = payload.get("sub")
-        # 如果用户id不存在，抛出credentials_exception
-        if user_id is None:
+        # 如果用户id不存在或者是设备令牌，抛出credentials_exception
+        if user_id is None or payload.get("typ") == "device":
             raise credentials_exception
     except jwt.JWTError:
         # 如果解码token出错，抛出credentials_exception
         raise credentials_exception
-        
+    request.state.user_id = user_id
+
+    # 缓存命中时直接返回用户快照，不再查询数据库
+    principal = await principal_cache.get(user_id)
+    if principal is not None and settings.PRINCIPAL_CACHE_SKIP_DB:
+        return principal
+
     # 从数据库中查询用户信息
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    result = await db.execute(
+        select(models.User).where(models.User.id == user_id)
+    )
+    user = result.scalars().first()
     # 如果用户不存在，抛出credentials_exception
     if user is None:
         raise credentials_exception
+    if principal is None:
+        await principal_cache.set(user)
     # 返回用户信息
-    return user 
\ No newline at end of file
+    return user
+
+def get_heartbeat_device_id(
+    device_id: str,
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[str]:
+    """校验设备令牌，返回已认证的设备id
+
+    未携带设备令牌时返回None，由接口决定是否允许匿名访问；
+    令牌属于其他设备时返回403
+    """
+    token_device_id = decode_device_token(token)
+    if token_device_id is None:
+        return None
+    if token_device_id != device_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="设备令牌与设备不匹配"
+        )
+    return token_device_id
+
+async def get_batch_context(
+    current_user = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme)
+) -> BatchContext:
+    """创建 /batch 的共享上下文，读己之写只对整个批量请求检查一次"""
+    return BatchContext(current_user, use_primary=await _use_primary_for_reads(token))
+
+def rate_limit(name: str):
+    """路由限流依赖
+
+    用法: @router.get(..., dependencies=[Depends(deps.rate_limit("export"))])
+    已登录用户按用户id限流，未登录按客户端IP限流 (经过可信代理时取转发的客户端IP)；超过限制时返回429
+    """
+    async def check(
+        request: Request,
+        token: Optional[str] = Depends(optional_oauth2_scheme)
+    ) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        user_id = _token_subject(token)
+        if user_id is None:
+            tier = "anonymous"
+            identity = f"ip:{client_ip(request)}"
+        else:
+            principal = await principal_cache.get(user_id)
+            tier = "superuser" if principal is not None and principal.is_superuser else "default"
+            identity = f"user:{user_id}"
+
+        result = await rate_limiter.hit(name, tier, identity)
+        if result is None:
+            return
+        # 由 RateLimitHeadersMiddleware 写入响应头
+        request.state.rate_limit_headers = result.headers()
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="请求过于频繁，请稍后再试",
+                headers=result.headers()
+            )
+    return check
+
+def idempotency(scope: str):
+    """幂等键依赖
+
+    用法: idem: IdempotentRequest = Depends(deps.idempotency("posts"))
+    请求带 Idempotency-Key 时占用该键；idem.replay 不为None时直接返回它，
+    否则执行成功后 return await idem.complete(response)，失败时 await idem.release()
+    """
+    async def begin(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+        current_user = Depends(get_current_user)
+    ) -> IdempotentRequest:
+        if idempotency_key is None:
+            return IdempotentRequest()
+        if not 0 < len(idempotency_key) <= 255:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Idempotency-Key 长度应为1-255个字符"
+            )
+        key = idempotency_store.key_for(scope, current_user.id, idempotency_key)
+        fingerprint = request_fingerprint(request.method, request.url.path, await request.body())
+        return await idempotency_store.begin(key, fingerprint)
+    return begin
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, accounts, posts, teams, devices, analytics
+from app.api.v1 import auth, accounts, posts, teams, devices, analytics, batch
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router.include_router(accounts.router, prefix="/accounts", tags=["账号管
 api_router.include_router(posts.router, prefix="/posts", tags=["内容发布"])
 api_router.include_router(teams.router, prefix="/teams", tags=["团队管理"])
 api_router.include_router(devices.router, prefix="/devices", tags=["设备管理"])
-api_router.include_router(analytics.router, prefix="/analytics", tags=["数据分析"]) 
\ No newline at end of file
+api_router.include_router(analytics.router, prefix="/analytics", tags=["数据分析"])
+api_router.include_router(batch.router, prefix="/batch", tags=["批量请求"])
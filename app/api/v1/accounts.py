@@ -9,14 +9,18 @@
 """
 
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app.api import deps
 from app.services.account_service import AccountService
 from app.utils.logger import logger
 from app.schemas.common import ResponseModel
+from app.core.responses import model_response
+from app.cache.etag import etag_matches, not_modified, resource_etag, set_etag
+from app.utils.pagination import next_cursor
+from app.utils.fields import fields_schema, parse_fields
 
 router = APIRouter()
 account_service = AccountService()
@@ -24,7 +28,7 @@ account_service = AccountService()
 @router.post("/", response_model=ResponseModel[schemas.Account])
 async def create_account(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     account_in: schemas.AccountCreate,
     current_user: models.User = Depends(deps.get_current_user)
 ) -> Any:
@@ -67,28 +71,43 @@ async def create_account(
 
 @router.get("/", response_model=ResponseModel[List[schemas.Account]])
 async def get_accounts(
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_mysql_read_db),
     skip: int = 0,
     limit: int = 100,
     platform: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_user)
 ) -> Any:
     """
     获取用户的社交媒体账号列表
+
+    传入上一页返回的 next_cursor 作为 cursor 时使用游标分页，忽略 skip
+    fields 为逗号分隔的字段名时只查询、返回这些字段 (id 始终返回)
+    带 If-None-Match 且账号未变化时返回304
     """
+    etag = await resource_etag(request, "accounts", current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
+        selected = parse_fields(fields, schemas.Account)
         accounts = await account_service.get_user_accounts(
             db=db,
             user_id=current_user.id,
             skip=skip,
             limit=limit,
-            platform=platform
+            platform=platform,
+            cursor=cursor,
+            fields=selected
         )
-        return ResponseModel(
-            code=200,
-            msg="获取成功",
-            data=accounts
+        response = model_response(
+            List[fields_schema(schemas.Account, selected)],
+            accounts,
+            next_cursor=next_cursor(accounts, limit)
         )
+        set_etag(response, etag)
+        return response
     except Exception as e:
         logger.error(f"获取账号列表错误: {str(e)}")
         return ResponseModel(
@@ -100,12 +119,16 @@ async def get_accounts(
 @router.get("/{account_id}", response_model=schemas.Account)
 async def get_account(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_mysql_read_db),
     account_id: int,
     current_user: models.User = Depends(deps.get_current_user)
 ) -> Any:
     """
     获取特定账号的详细信息
+
+    ETag按用户计算，先确认账号存在且属于当前用户，再比较ETag
     """
     account = await account_service.get_account(db=db, account_id=account_id)
     if not account:
@@ -118,12 +141,16 @@ async def get_account(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
+    etag = await resource_etag(request, "accounts", current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return account
 
 @router.put("/{account_id}", response_model=schemas.Account)
 async def update_account(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     account_id: int,
     account_in: schemas.AccountUpdate,
     current_user: models.User = Depends(deps.get_current_user)
@@ -159,7 +186,7 @@ async def update_account(
 @router.delete("/{account_id}", response_model=ResponseModel[dict])
 async def delete_account(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     account_id: int,
     current_user: models.User = Depends(deps.get_current_user)
 ) -> Any:
@@ -192,7 +219,7 @@ async def delete_account(
 @router.post("/{account_id}/refresh-token")
 async def refresh_account_token(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     account_id: int,
     current_user: models.User = Depends(deps.get_current_user)
 ) -> Any:
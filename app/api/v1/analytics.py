@@ -18,6 +18,10 @@ from app.api import deps
 from app.services.analytics_service import AnalyticsService
 from app.utils.logger import logger
 from app.schemas.common import ResponseModel
+from app.services.analytics_service import ANALYTICS_EXPORTS
+from app.utils.export import EXPORT_FORMATS, export_response, iter_export_sync
+from app.db.routing import replica_router
+from app.db.session import PostgresSessionLocal
 
 router = APIRouter()
 analytics_service = AnalyticsService()
@@ -25,7 +29,7 @@ analytics_service = AnalyticsService()
 @router.get("/content/{content_id}", response_model=ResponseModel[schemas.ContentAnalytics])
 async def get_content_analytics(
     *,
-    mysql_db: Session = Depends(deps.get_mysql_db),
+    mysql_db: Session = Depends(deps.get_mysql_read_db),
     postgres_db: Session = Depends(deps.get_postgres_db),
     content_id: int,
     current_user: models.User = Depends(deps.get_current_user)
@@ -53,7 +57,7 @@ async def get_content_analytics(
 @router.get("/account/{account_id}", response_model=ResponseModel[schemas.AccountAnalytics])
 async def get_account_analytics(
     *,
-    mysql_db: Session = Depends(deps.get_mysql_db),
+    mysql_db: Session = Depends(deps.get_mysql_read_db),
     postgres_db: Session = Depends(deps.get_postgres_db),
     account_id: int,
     start_date: datetime,
@@ -85,6 +89,7 @@ async def get_account_analytics(
 @router.get("/trends", response_model=ResponseModel[schemas.TrendsAnalysis])
 async def get_trends_analysis(
     *,
+    mysql_db: Session = Depends(deps.get_mysql_read_db),
     postgres_db: Session = Depends(deps.get_postgres_db),
     platform: Optional[str] = None,
     period: str = "7d",
@@ -93,7 +98,8 @@ async def get_trends_analysis(
     """获取趋势分析数据"""
     try:
         trends = await analytics_service.get_trends(
-            db=postgres_db,
+            mysql_db=mysql_db,
+            postgres_db=postgres_db,
             user_id=current_user.id,
             platform=platform,
             period=period
@@ -111,10 +117,14 @@ async def get_trends_analysis(
             data={"error": f"{str(e)}"}
         )
 
-@router.get("/performance-report", response_model=ResponseModel[schemas.PerformanceReport])
+@router.get(
+    "/performance-report",
+    response_model=ResponseModel[schemas.PerformanceReport],
+    dependencies=[Depends(deps.rate_limit("analytics_report"))]
+)
 async def get_performance_report(
     *,
-    mysql_db: Session = Depends(deps.get_mysql_db),
+    mysql_db: Session = Depends(deps.get_mysql_read_db),
     postgres_db: Session = Depends(deps.get_postgres_db),
     start_date: datetime,
     end_date: datetime,
@@ -144,12 +154,17 @@ async def get_performance_report(
 
 @router.get("/summary", response_model=ResponseModel[schemas.AnalyticsSummary])
 async def get_summary(
-    db: Session = Depends(deps.get_mysql_db),
+    mysql_db: Session = Depends(deps.get_mysql_read_db),
+    postgres_db: Session = Depends(deps.get_postgres_db),
     current_user = Depends(deps.get_current_user)
 ) -> Any:
     """获取分析摘要"""
     try:
-        summary = await analytics_service.get_summary(db, user_id=current_user.id)
+        summary = await analytics_service.get_summary(
+            mysql_db=mysql_db,
+            postgres_db=postgres_db,
+            user_id=current_user.id
+        )
         return ResponseModel(
             code=200,
             msg="获取成功",
@@ -161,4 +176,54 @@ async def get_summary(
             code=201,
             msg="获取分析摘要失败",
             data={"error": f"{str(e)}"}
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/export", dependencies=[Depends(deps.rate_limit("export"))])
+async def export_analytics(
+    kind: str = "content",
+    format: str = "ndjson",
+    after_id: int = 0,
+    until_id: Optional[int] = None,
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """流式导出用户的分析历史 (NDJSON / CSV)
+
+    kind: content 内容分析 / account 账号分析
+    按id升序输出，中断后用 after_id / until_id 继续导出
+    """
+    if kind not in ANALYTICS_EXPORTS or format not in EXPORT_FORMATS:
+        return ResponseModel(
+            code=201,
+            msg="不支持的导出类型或格式",
+            data={"error": f"kind必须为 {', '.join(ANALYTICS_EXPORTS)}，format必须为 {', '.join(EXPORT_FORMATS)}"}
+        )
+
+    mysql_db = replica_router.session()
+    postgres_db = PostgresSessionLocal()
+    try:
+        scope = analytics_service.analytics_export_scope(mysql_db, current_user.id, kind)
+        if until_id is None:
+            until_id = analytics_service.get_max_analytics_id(postgres_db, scope) or after_id
+    except Exception as e:
+        postgres_db.close()
+        logger.error(f"导出分析数据错误: {str(e)}")
+        return ResponseModel(
+            code=201,
+            msg="导出分析数据失败",
+            data={"error": f"{str(e)}"}
+        )
+    finally:
+        mysql_db.close()
+
+    def rows():
+        try:
+            yield from analytics_service.stream_analytics(
+                postgres_db, scope, after_id=after_id, until_id=until_id
+            )
+        finally:
+            postgres_db.close()
+
+    columns = [column.name for column in scope.table.columns]
+    return export_response(
+        iter_export_sync(rows(), format, columns), format, f"{kind}_analytics", after_id, until_id
+    )
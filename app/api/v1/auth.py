@@ -54,7 +54,11 @@ async def register(
             data={"error": f"注册错误: {str(e)}"}
         )
 
-@router.post("/login", response_model=ResponseModel[schemas.Token])
+@router.post(
+    "/login",
+    response_model=ResponseModel[schemas.Token],
+    dependencies=[Depends(deps.rate_limit("auth_login"))]
+)
 async def login(
     db: Session = Depends(deps.get_mysql_db),
     form_data: OAuth2PasswordRequestForm = Depends()
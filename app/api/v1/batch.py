@@ -0,0 +1,157 @@
+"""
+批量请求API模块
+
+一次请求执行多个只读子请求，减少仪表盘首屏的往返次数：
+1. 只认证一次，子请求直接使用已认证的用户
+2. 读己之写只检查一次，子请求各自创建会话 (同步会话在线程池中使用，不能跨子请求共享)
+3. 子请求在进程内并发执行，经过与普通请求相同的路由和中间件
+4. 每个子请求单独返回状态码、响应头和响应体
+"""
+
+import asyncio
+from typing import Any, Dict, List, Tuple
+import orjson
+from fastapi import APIRouter, Depends, Request
+from app import schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.responses import model_response
+from app.schemas.common import ResponseModel
+from app.utils.logger import logger
+
+router = APIRouter()
+
+# 转发给子请求的请求头
+_FORWARDED_HEADERS = {b"authorization", b"host", b"user-agent", b"accept-language"}
+# 子请求不能覆盖的请求头
+_PROTECTED_HEADERS = {"authorization", "host", "accept-encoding", "content-length", "transfer-encoding"}
+# 返回给客户端的子响应头
+_RETURNED_HEADERS = {"etag", "cache-control", "retry-after", "ratelimit-limit", "ratelimit-remaining", "ratelimit-reset"}
+
+
+def _error(item: schemas.BatchRequestItem, status: int, detail: str) -> Dict[str, Any]:
+    return {"id": item.id, "status": status, "headers": {}, "body": {"detail": detail}}
+
+def _decode_body(body: bytes, content_type: str) -> Any:
+    if not body:
+        return None
+    if "json" in content_type:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return body.decode("utf-8", "replace")
+
+async def _call(
+    request: Request,
+    batch: deps.BatchContext,
+    full_path: str,
+    query: str,
+    headers: List[Tuple[bytes, bytes]]
+) -> Tuple[int, Dict[str, str], bytes]:
+    """通过ASGI在进程内调用应用，返回状态码、响应头和响应体"""
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": {"batch": batch},
+    }
+
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 请求体已发送完，之后只在子请求结束时返回断开
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers: List = []
+    body = bytearray()
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    finally:
+        finished.set()
+    decoded = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in response_headers}
+    return status, decoded, bytes(body)
+
+async def _dispatch(request: Request, batch: deps.BatchContext, item: schemas.BatchRequestItem) -> Dict[str, Any]:
+    """执行一个子请求"""
+    if item.method.upper() != "GET":
+        return _error(item, 405, "批量请求只支持GET")
+    path, _, query = item.path.partition("?")
+    if not path.startswith("/") or path.startswith("/batch") or path.rstrip("/").endswith("/export"):
+        return _error(item, 400, "不支持的子请求路径")
+
+    headers = [(k, v) for k, v in request.headers.raw if k in _FORWARDED_HEADERS]
+    headers += [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in item.headers.items()
+        if name.lower() not in _PROTECTED_HEADERS
+    ]
+    full_path = f"{settings.API_V1_STR}{path}"
+    try:
+        status, response_headers, body = await _call(request, batch, full_path, query, headers)
+        if status in (307, 308) and not full_path.endswith("/"):
+            # 列表接口的路由以 / 结尾，直接补上而不是把重定向返回给客户端
+            status, response_headers, body = await _call(request, batch, f"{full_path}/", query, headers)
+    except Exception as e:
+        logger.error(f"批量子请求错误 {item.path}: {str(e)}")
+        return _error(item, 500, "子请求执行失败")
+
+    return {
+        "id": item.id,
+        "status": status,
+        "headers": {k: v for k, v in response_headers.items() if k in _RETURNED_HEADERS},
+        "body": _decode_body(body, response_headers.get("content-type", "")),
+    }
+
+
+@router.post("/", response_model=ResponseModel[List[schemas.BatchResponseItem]])
+async def run_batch(
+    request: Request,
+    batch_in: schemas.BatchRequest,
+    batch: deps.BatchContext = Depends(deps.get_batch_context)
+) -> Any:
+    """批量执行只读子请求
+
+    path 为相对于API前缀的路径，如 {"requests": [{"id": "a", "path": "/accounts"},
+    {"id": "t", "path": "/teams"}]}，结果按请求顺序返回
+    """
+    if len(batch_in.requests) > settings.BATCH_MAX_REQUESTS:
+        return ResponseModel(
+            code=201,
+            msg="子请求数量超出限制",
+            data={"error": f"最多 {settings.BATCH_MAX_REQUESTS} 个子请求"}
+        )
+
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def run(item: schemas.BatchRequestItem) -> Dict[str, Any]:
+        async with semaphore:
+            return await _dispatch(request, batch, item)
+
+    results = await asyncio.gather(*[run(item) for item in batch_in.requests])
+    return model_response(List[schemas.BatchResponseItem], results, msg="执行完成")
@@ -2,37 +2,74 @@
 设备相关的API路由
 """
 
-from typing import Any, List
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, status
 from sqlalchemy.orm import Session
 from app import schemas
 from app.api import deps
+from app.core.security import create_device_token, decode_device_token
+from app.db.session import MySQLSessionLocal
 from app.services.device_service import DeviceService
+from app.services.device_channel import device_channel
+from app.services.device_metrics_service import DeviceMetricsService, device_metrics_buffer
+from app.cache.presence import online_device_ids
 from app.schemas.common import ResponseModel
+from app.core.responses import model_response
+from app.utils.fields import fields_schema, parse_fields
+from app.cache.etag import etag_matches, not_modified, resource_etag, set_etag
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 device_service = DeviceService()
+device_metrics_service = DeviceMetricsService()
 
 @router.get("/", response_model=ResponseModel[List[schemas.Device]])
 async def list_devices(
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    db: Session = Depends(deps.get_mysql_read_db),
+    fields: Optional[str] = None,
     current_user = Depends(deps.get_current_user)
 ) -> Any:
-    """获取用户的设备列表"""
+    """获取用户的设备列表
+
+    fields 为逗号分隔的字段名时只查询、返回这些字段 (id 始终返回)
+    """
+    etag = await resource_etag(request, "devices", current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
-        devices = await device_service.get_user_devices(db, user_id=current_user.id)
+        selected = parse_fields(fields, schemas.Device)
+        devices = await device_service.get_user_devices(db, user_id=current_user.id, fields=selected)
+        response = model_response(List[fields_schema(schemas.Device, selected)], devices)
+        set_etag(response, etag)
+        return response
+    except Exception as e:
+        logger.error(f"获取设备列表错误: {str(e)}")
+        return ResponseModel(
+            code=201,
+            msg="获取设备列表失败",
+            data={"error": f"{str(e)}"}
+        )
+
+@router.get("/online", response_model=ResponseModel[List[str]])
+async def list_online_devices(
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """获取用户当前在线的设备id，按最近心跳时间从新到旧"""
+    try:
+        device_ids = await online_device_ids(current_user.id)
         return ResponseModel(
             code=200,
             msg="获取成功",
-            data=devices
+            data=device_ids
         )
     except Exception as e:
-        logger.error(f"获取设备列表错误: {str(e)}")
+        logger.error(f"获取在线设备错误: {str(e)}")
         return ResponseModel(
             code=201,
-            msg="获取设备列表失败",
+            msg="获取在线设备失败",
             data={"error": f"{str(e)}"}
         )
 
@@ -80,6 +117,9 @@ async def update_device_config(
             )
         
         device = await device_service.update_config(db, device=device, config=config_in.config)
+        # 推送相对上一版本的增量给在线设备，离线设备在之后的心跳中同步
+        delta = await device_service.config_delta(db, device, device.config_version - 1)
+        await device_channel.send_command(device.device_id, "config", delta)
         return ResponseModel(
             code=200,
             msg="更新成功",
@@ -98,17 +138,38 @@ async def device_heartbeat(
     *,
     db: Session = Depends(deps.get_mysql_db),
     device_id: str,
-    heartbeat_in: schemas.DeviceHeartbeat
+    heartbeat_in: schemas.DeviceHeartbeat,
+    authenticated_device_id: Optional[str] = Depends(deps.get_heartbeat_device_id)
 ) -> Any:
-    """设备心跳"""
+    """设备心跳
+
+    带 config_version 时返回配置变化：版本一致时为 {"status": "unchanged"}，
+    否则为 JSON Patch 增量 (patch) 或完整配置 (full)
+    上报指标和同步配置需要携带该设备的令牌 (Authorization: Bearer <device_token>)
+    """
+    if authenticated_device_id is None and (
+        heartbeat_in.metrics or heartbeat_in.config_version is not None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="上报指标和同步配置需要设备令牌",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     try:
         await device_service.update_heartbeat(
             db, device_id=device_id, status=heartbeat_in.status
         )
+        if authenticated_device_id is not None:
+            device_metrics_buffer.add(authenticated_device_id, heartbeat_in.metrics)
+        data = {"device_id": device_id}
+        if heartbeat_in.config_version is not None:
+            data["config"] = await device_service.sync_config(
+                db, device_id=device_id, client_version=heartbeat_in.config_version
+            )
         return ResponseModel(
             code=200,
             msg="心跳更新成功",
-            data={"device_id": device_id}
+            data=data
         )
     except Exception as e:
         logger.error(f"设备心跳更新错误: {str(e)}")
@@ -116,4 +177,132 @@ async def device_heartbeat(
             code=201,
             msg="心跳更新失败",
             data={"error": f"{str(e)}"}
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/{device_id}/metrics", response_model=ResponseModel[schemas.DeviceMetricSeries])
+async def get_device_metrics(
+    *,
+    db: Session = Depends(deps.get_mysql_read_db),
+    postgres_db: Session = Depends(deps.get_postgres_db),
+    device_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[str] = None,
+    names: Optional[str] = None,
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """查询设备指标
+
+    默认返回最近1小时；resolution 为 1m / 1h，不传时按时间跨度选择；
+    names 为逗号分隔的指标名，如 names=cpu,battery；不带时区的时间按UTC处理
+    """
+    try:
+        device = await device_service.get_device(db, device_id=device_id)
+        if not device or device.user_id != current_user.id:
+            return ResponseModel(
+                code=201,
+                msg="设备不存在或无权限",
+                data={}
+            )
+        end = end or datetime.now(timezone.utc)
+        start = start or end - timedelta(hours=1)
+        selected = [name.strip() for name in names.split(",") if name.strip()] if names else None
+        resolution, points = await device_metrics_service.get_metrics(
+            postgres_db, device_id, start, end, resolution=resolution, names=selected
+        )
+        return model_response(
+            schemas.DeviceMetricSeries,
+            {"device_id": device_id, "resolution": resolution, "points": points}
+        )
+    except Exception as e:
+        logger.error(f"获取设备指标错误: {str(e)}")
+        return ResponseModel(
+            code=201,
+            msg="获取设备指标失败",
+            data={"error": f"{str(e)}"}
+        )
+
+@router.post("/{device_id}/token", response_model=ResponseModel[schemas.DeviceToken])
+async def create_token(
+    *,
+    db: Session = Depends(deps.get_mysql_read_db),
+    device_id: str,
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """为自己的设备签发设备令牌，设备用它连接 /devices/ws"""
+    device = await device_service.get_device(db, device_id=device_id)
+    if not device or device.user_id != current_user.id:
+        return ResponseModel(
+            code=201,
+            msg="设备不存在或无权限",
+            data={}
+        )
+    return ResponseModel(
+        code=200,
+        msg="签发成功",
+        data=schemas.DeviceToken(device_token=create_device_token(device.device_id))
+    )
+
+@router.post("/{device_id}/commands", response_model=ResponseModel[dict])
+async def send_device_command(
+    *,
+    db: Session = Depends(deps.get_mysql_read_db),
+    device_id: str,
+    command_in: schemas.DeviceCommand,
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """通过设备长连接下发任务命令"""
+    try:
+        device = await device_service.get_device(db, device_id=device_id)
+        if not device or device.user_id != current_user.id:
+            return ResponseModel(
+                code=201,
+                msg="设备不存在或无权限",
+                data={}
+            )
+        command_id = await device_channel.send_command(
+            device.device_id, "task", {"command": command_in.command, "params": command_in.params}
+        )
+        return ResponseModel(
+            code=200,
+            msg="命令已下发",
+            data={"command_id": command_id}
+        )
+    except Exception as e:
+        logger.error(f"下发设备命令错误: {str(e)}")
+        return ResponseModel(
+            code=201,
+            msg="下发设备命令失败",
+            data={"error": f"{str(e)}"}
+        )
+
+@router.websocket("/ws")
+async def device_socket(websocket: WebSocket, token: Optional[str] = None) -> None:
+    """设备长连接
+
+    设备令牌通过 Authorization: Bearer <token> 请求头或 ?token= 传入。
+    设备上报: {"type": "heartbeat", "status": "online", "config_version": 3} / {"type": "ping"} / {"type": "ack", "id": ...}
+    服务端下发: {"id": ..., "type": "config" | "task", "data": {...}} / {"type": "pong"}
+    心跳中的配置版本落后时下发 config 命令 (增量或完整配置)，版本一致时不下发
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    device_id = decode_device_token(token)
+    if device_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # 只在建立连接时查询一次数据库，连接期间的心跳不再访问数据库
+    db = MySQLSessionLocal()
+    try:
+        device = await device_service.get_device(db, device_id=device_id)
+        if device is not None:
+            db.expunge(device)
+    finally:
+        db.close()
+    if device is None or not device.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await device_channel.serve(websocket, device)
@@ -2,13 +2,20 @@
 内容发布相关的API路由
 """
 
-from typing import Any, List
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app import schemas
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
 from app.api import deps
 from app.services.content_service import ContentService
 from app.schemas.common import ResponseModel
+from app.core.responses import model_response
+from app.cache.idempotency import IdempotentRequest
+from app.cache.etag import etag_matches, not_modified, resource_etag, set_etag
+from app.utils.pagination import next_cursor
+from app.utils.export import EXPORT_FORMATS, export_response, iter_export
+from app.utils.fields import fields_schema, parse_fields
+from app.db.routing import replica_router
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,21 +24,35 @@ content_service = ContentService()
 
 @router.get("/", response_model=ResponseModel[List[schemas.Content]])
 async def list_contents(
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_mysql_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user = Depends(deps.get_current_user)
 ) -> Any:
-    """获取内容列表"""
+    """获取内容列表
+
+    传入上一页返回的 next_cursor 作为 cursor 时使用游标分页，忽略 skip
+    fields 为逗号分隔的字段名时只查询、返回这些字段 (id 始终返回)
+    带 If-None-Match 且内容未变化时返回304
+    """
+    etag = await resource_etag(request, "posts", current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
+        selected = parse_fields(fields, schemas.Content)
         contents = await content_service.get_user_contents(
-            db, user_id=current_user.id, skip=skip, limit=limit
+            db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor, fields=selected
         )
-        return ResponseModel(
-            code=200,
-            msg="获取成功",
-            data=contents
+        response = model_response(
+            List[fields_schema(schemas.Content, selected)],
+            contents,
+            next_cursor=next_cursor(contents, limit)
         )
+        set_etag(response, etag)
+        return response
     except Exception as e:
         logger.error(f"获取内容列表错误: {str(e)}")
         return ResponseModel(
@@ -40,24 +61,73 @@ async def list_contents(
             data={"error": f"{str(e)}"}
         )
 
+@router.get("/export", dependencies=[Depends(deps.rate_limit("export"))])
+async def export_contents(
+    format: str = "ndjson",
+    after_id: int = 0,
+    until_id: Optional[int] = None,
+    current_user = Depends(deps.get_current_user)
+) -> Any:
+    """流式导出用户的全部内容 (NDJSON / CSV)
+
+    按id升序输出；中断后以最后收到的id作为 after_id、
+    响应头 X-Export-Range 中的上界作为 until_id 继续导出
+    """
+    if format not in EXPORT_FORMATS:
+        return ResponseModel(
+            code=201,
+            msg="不支持的导出格式",
+            data={"error": f"format必须为 {', '.join(EXPORT_FORMATS)}"}
+        )
+
+    db = replica_router.async_session()
+    try:
+        if until_id is None:
+            until_id = await content_service.get_max_content_id(db, user_id=current_user.id) or after_id
+    except Exception as e:
+        await db.close()
+        logger.error(f"导出内容错误: {str(e)}")
+        return ResponseModel(
+            code=201,
+            msg="导出内容失败",
+            data={"error": f"{str(e)}"}
+        )
+
+    async def rows():
+        try:
+            async for row in content_service.stream_user_contents(
+                db, user_id=current_user.id, after_id=after_id, until_id=until_id
+            ):
+                yield row
+        finally:
+            await db.close()
+
+    columns = [column.name for column in models.Content.__table__.columns]
+    return export_response(iter_export(rows(), format, columns), format, "contents", after_id, until_id)
+
 @router.post("/", response_model=ResponseModel[schemas.Content])
 async def create_content(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     content_in: schemas.ContentCreate,
-    current_user = Depends(deps.get_current_user)
+    current_user = Depends(deps.get_current_user),
+    idem: IdempotentRequest = Depends(deps.idempotency("posts"))
 ) -> Any:
-    """创建新内容"""
+    """创建新内容
+
+    带 Idempotency-Key 请求头时，相同键的重试返回第一次创建的结果而不会重复创建
+    """
+    if idem.replay is not None:
+        return idem.replay
     try:
         content = await content_service.create(
             db, obj_in=content_in, user_id=current_user.id
         )
-        return ResponseModel(
-            code=200,
-            msg="创建成功",
-            data=content
+        return await idem.complete(
+            model_response(schemas.Content, content, msg="创建成功")
         )
     except Exception as e:
+        await idem.release()
         logger.error(f"创建内容错误: {str(e)}")
         return ResponseModel(
             code=201,
@@ -68,7 +138,7 @@ async def create_content(
 @router.put("/{content_id}", response_model=ResponseModel[schemas.Content])
 async def update_content(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     content_id: int,
     content_in: schemas.ContentUpdate,
     current_user = Depends(deps.get_current_user)
@@ -102,7 +172,7 @@ async def update_content(
 @router.delete("/{content_id}", response_model=ResponseModel[dict])
 async def delete_content(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    db: AsyncSession = Depends(deps.get_async_mysql_db),
     content_id: int,
     current_user = Depends(deps.get_current_user)
 ) -> Any:
@@ -3,12 +3,14 @@
 """
 
 from typing import Any, List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from app import schemas
 from app.api import deps
 from app.services.team_service import TeamService
 from app.schemas.common import ResponseModel
+from app.core.responses import model_response
+from app.cache.etag import etag_matches, not_modified, resource_etag, set_etag
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,17 +19,19 @@ team_service = TeamService()
 
 @router.get("/", response_model=ResponseModel[List[schemas.Team]])
 async def list_teams(
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    db: Session = Depends(deps.get_mysql_read_db),
     current_user = Depends(deps.get_current_user)
 ) -> Any:
     """获取用户的团队列表"""
+    etag = await resource_etag(request, "teams", current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
         teams = await team_service.get_user_teams(db, user_id=current_user.id)
-        return ResponseModel(
-            code=200,
-            msg="获取成功",
-            data=teams
-        )
+        response = model_response(List[schemas.Team], teams)
+        set_etag(response, etag)
+        return response
     except Exception as e:
         logger.error(f"获取团队列表错误: {str(e)}")
         return ResponseModel(
@@ -62,11 +66,16 @@ async def create_team(
 @router.get("/{team_id}", response_model=ResponseModel[schemas.Team])
 async def get_team(
     *,
-    db: Session = Depends(deps.get_mysql_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_mysql_read_db),
     team_id: int,
     current_user = Depends(deps.get_current_user)
 ) -> Any:
-    """获取团队详情"""
+    """获取团队详情
+
+    ETag按用户计算，先确认团队存在且属于当前用户，再比较ETag
+    """
     try:
         team = await team_service.get_team(db, team_id=team_id)
         if not team or team.owner_id != current_user.id:
@@ -75,6 +84,10 @@ async def get_team(
                 msg="团队不存在或无权限",
                 data={}
             )
+        etag = await resource_etag(request, "teams", current_user.id)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return ResponseModel(
             code=200,
             msg="获取成功",
@@ -0,0 +1,225 @@
+"""
+缓存装饰器模块
+
+为服务层的异步方法提供结果缓存：
+1. 根据参数生成缓存键 (忽略 self 和数据库会话)
+2. 硬过期(ttl) + 软过期(soft_ttl)：软过期后拿到锁的一个请求同步重算并返回新值，
+   其余请求直接返回旧值 (不在后台刷新：参数中的数据库会话随请求结束而关闭)
+3. 同一进程内相同键的并发未命中只计算一次
+4. 通过Redis锁保证多个worker不会同时重算同一个键
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Type
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache.redis import RedisCache, SyncRedisCache, dumps, make_key, redis_client
+from app.cache.tiered import model_from_dict, model_to_dict
+from app.utils.logger import logger
+
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_SKIPPED_PARAMS = ("self", "cls")
+# 计算的请求被取消时交给等待者的结果，等待者自行重新加载
+_RETRY = object()
+_SESSION_TYPES = (Session, AsyncSession)
+
+
+class _CachedMethod:
+    """被缓存的方法"""
+
+    def __init__(
+        self,
+        func: Callable,
+        namespace: str,
+        ttl: int,
+        soft_ttl: Optional[int],
+        model: Optional[Type],
+        lock_timeout: int
+    ):
+        self.func = func
+        self.namespace = namespace
+        self.ttl = ttl
+        self.soft_ttl = soft_ttl
+        self.model = model
+        self.lock_timeout = lock_timeout
+        self.signature = inspect.signature(func)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        functools.update_wrapper(self, func)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return functools.partial(self.__call__, instance)
+
+    # 键和序列化
+
+    def key_for(self, *args, **kwargs) -> str:
+        bound = self.signature.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        params = {
+            name: value
+            for name, value in bound.arguments.items()
+            if name not in _SKIPPED_PARAMS and not isinstance(value, _SESSION_TYPES)
+        }
+        digest = hashlib.sha1(dumps(sorted(params.items())).encode()).hexdigest()
+        return f"cached:{self.namespace}:{digest}"
+
+    def _encode(self, value: Any) -> Any:
+        if self.model is None or value is None:
+            return value
+        if isinstance(value, list):
+            return [model_to_dict(item) for item in value]
+        return model_to_dict(value)
+
+    def _decode(self, data: Any) -> Any:
+        if self.model is None or data is None:
+            return data
+        if isinstance(data, list):
+            return [model_from_dict(self.model, item) for item in data]
+        return model_from_dict(self.model, data)
+
+    # Redis锁
+
+    async def _acquire_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.set(
+                make_key(f"lock:{key}"), token, nx=True, ex=self.lock_timeout
+            )
+        except Exception as e:
+            logger.warning(f"获取缓存锁失败 {key}: {str(e)}")
+            # Redis不可用时直接计算
+            return token
+        return token if acquired else None
+
+    async def _release_lock(self, key: str, token: str) -> None:
+        try:
+            await redis_client.eval(_RELEASE_LOCK, 1, make_key(f"lock:{key}"), token)
+        except Exception as e:
+            logger.warning(f"释放缓存锁失败 {key}: {str(e)}")
+
+    # 读写
+
+    async def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await RedisCache.get(key)
+        except Exception as e:
+            logger.warning(f"读取缓存失败 {key}: {str(e)}")
+            return None
+
+    async def _compute_and_store(self, key: str, args, kwargs) -> Any:
+        data = self._encode(await self.func(*args, **kwargs))
+        try:
+            await RedisCache.set(key, {"v": data, "t": time.time()}, expire=self.ttl)
+        except Exception as e:
+            logger.warning(f"写入缓存失败 {key}: {str(e)}")
+        return data
+
+    async def _wait_for_value(self, key: str) -> Optional[Dict[str, Any]]:
+        """其他worker正在计算时等待结果，超时返回None"""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            entry = await self._read(key)
+            if entry is not None:
+                return entry
+            delay = min(delay * 2, 0.5)
+        return None
+
+    async def _load(self, key: str, args, kwargs) -> Any:
+        token = await self._acquire_lock(key)
+        if token is None:
+            entry = await self._wait_for_value(key)
+            if entry is not None:
+                return entry["v"]
+            return await self._compute_and_store(key, args, kwargs)
+        try:
+            return await self._compute_and_store(key, args, kwargs)
+        finally:
+            await self._release_lock(key, token)
+
+    async def _single_flight(self, key: str, args, kwargs) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            data = await asyncio.shield(future)
+            if data is _RETRY:
+                return await self._single_flight(key, args, kwargs)
+            return data
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._load(key, args, kwargs)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            # 只取消本请求 (如客户端断开)，等待者重新加载，其中一个接替计算
+            future.set_result(_RETRY)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        key = self.key_for(*args, **kwargs)
+        entry = await self._read(key)
+
+        if entry is not None:
+            age = time.time() - entry.get("t", 0)
+            if self.soft_ttl is None or age < self.soft_ttl or key in self._inflight:
+                return self._decode(entry["v"])
+            # 软过期：拿到锁的请求在本次请求内重算，其余请求直接返回旧值
+            token = await self._acquire_lock(key)
+            if token is None:
+                return self._decode(entry["v"])
+            try:
+                return self._decode(await self._compute_and_store(key, args, kwargs))
+            finally:
+                await self._release_lock(key, token)
+
+        return self._decode(await self._single_flight(key, args, kwargs))
+
+    async def invalidate(self, *args, **kwargs) -> None:
+        """删除指定参数对应的缓存，不需要传数据库会话"""
+        await RedisCache.delete(self.key_for(*args, **kwargs))
+
+    def invalidate_sync(self, *args, **kwargs) -> None:
+        SyncRedisCache.delete(self.key_for(*args, **kwargs))
+
+
+def cached(
+    namespace: str,
+    ttl: int = 300,
+    soft_ttl: Optional[int] = None,
+    model: Optional[Type] = None,
+    lock_timeout: int = 30
+):
+    """缓存服务方法的返回值
+
+    参数:
+        namespace: 缓存键前缀
+        ttl: 硬过期时间(秒)
+        soft_ttl: 软过期时间(秒)，超过后由拿到锁的一个请求重算，其余请求返回旧值
+        model: 返回值为ORM对象(或列表)时指定模型，按列缓存
+        lock_timeout: 重算锁的持有时间(秒)，也是等待其他worker结果的上限
+    """
+    def decorator(func: Callable) -> _CachedMethod:
+        return _CachedMethod(func, namespace, ttl, soft_ttl, model, lock_timeout)
+    return decorator
@@ -0,0 +1,127 @@
+"""
+条件请求(ETag)模块
+
+每个用户的每类资源在Redis中维护一个版本号：
+1. 写入提交后递增对应用户、对应资源的版本号
+2. ETag 由资源、用户、版本号和请求地址生成，不需要加载数据行
+3. If-None-Match 与当前ETag一致时直接返回304
+"""
+
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import Request, Response
+from app import models
+from app.cache.redis import make_key, redis_client, sync_redis_client
+from app.core.events import WriteEvent, register_write_listener
+from app.utils.logger import logger
+
+# 写入这些模型时递增对应资源的版本号
+RESOURCES: Dict[type, str] = {
+    models.Account: "accounts",
+    models.Content: "posts",
+    models.Team: "teams",
+    models.Device: "devices",
+}
+
+def _version_key(resource: str, user_id: int) -> str:
+    return make_key(f"ver:{resource}:{user_id}")
+
+async def resource_version(resource: str, user_id: int) -> Optional[str]:
+    """获取用户某类资源的版本号，Redis不可用时返回None"""
+    key = _version_key(resource, user_id)
+    try:
+        version = await redis_client.get(key)
+        if version is None:
+            # 版本号不存在(首次访问或Redis数据丢失)时以当前时间为起点，避免与旧ETag重复
+            await redis_client.set(key, time.time_ns() // 1000, nx=True)
+            version = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"读取资源版本号失败 {resource}:{user_id}: {str(e)}")
+        return None
+    return version.decode() if isinstance(version, bytes) else str(version)
+
+async def resource_etag(request: Request, resource: str, user_id: int) -> Optional[str]:
+    """生成弱ETag，不同的路径和查询参数(分页、过滤)对应不同的ETag"""
+    version = await resource_version(resource, user_id)
+    if version is None:
+        return None
+    variant = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+    return f'W/"{resource}-{user_id}-{version}-{variant}"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """按弱比较判断 If-None-Match 是否命中"""
+    if_none_match = request.headers.get("if-none-match")
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in if_none_match.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    """成功响应带上ETag，客户端下次请求时回传"""
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+
+
+def _bumped(events: List[WriteEvent]) -> Set[Tuple[str, int]]:
+    return {
+        (RESOURCES[e.model], e.owner_id)
+        for e in events
+        if e.model in RESOURCES and e.owner_id is not None
+    }
+
+async def _bump_versions(events: List[WriteEvent]) -> None:
+    bumped = _bumped(events)
+    if not bumped:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for resource, user_id in bumped:
+                pipe.incr(_version_key(resource, user_id))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"更新资源版本号失败: {str(e)}")
+
+def _bump_versions_sync(events: List[WriteEvent]) -> None:
+    bumped = _bumped(events)
+    if not bumped:
+        return
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for resource, user_id in bumped:
+                pipe.incr(_version_key(resource, user_id))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"更新资源版本号失败: {str(e)}")
+
+register_write_listener(_bump_versions, _bump_versions_sync)
+
+async def bump_resource_version(resource: str, user_id: int) -> None:
+    """数据不经过数据库写入而变化时 (如Redis中的设备在线状态)，手动递增版本号"""
+    try:
+        await redis_client.incr(_version_key(resource, user_id))
+    except Exception as e:
+        logger.warning(f"更新资源版本号失败 {resource}:{user_id}: {str(e)}")
+
+def bump_resource_versions_sync(resource: str, user_ids: Iterable[int]) -> None:
+    """同步版本，一次递增多个用户的版本号"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.incr(_version_key(resource, user_id))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"更新资源版本号失败 {resource}: {str(e)}")
@@ -0,0 +1,295 @@
+"""
+设备心跳缓冲模块
+
+设备心跳不再逐条写MySQL：
+1. 心跳只写入Redis哈希 (device_id -> 最近状态、最近心跳时间)，并把设备加入待刷新集合
+2. Celery beat 每 HEARTBEAT_FLUSH_INTERVAL 秒把待刷新的设备用一条批量UPDATE写回 devices 表
+3. 读取设备状态时优先使用Redis中的状态，它总是不旧于数据库
+4. 刷新失败时待刷新集合保留，下一次刷新时合并重试
+5. 同一个脚本内维护在线设备集合 (app.cache.presence)，超时的设备由 expire() 批量标记为离线
+6. 设备上线、离线或状态变化时递增用户设备列表的ETag版本号，不必等到写回数据库
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app import models
+from app.cache.presence import (
+    PRESENCE_KEY,
+    USER_PRESENCE_PREFIX,
+    PresenceChange,
+    online_cutoff,
+    publish_changes,
+    publish_changes_sync,
+)
+from app.cache.etag import bump_resource_version, bump_resource_versions_sync
+from app.cache.redis import loads, make_key, redis_client, sync_redis_client
+from app.core.config import settings
+from app.core.events import WriteEvent, record_writes
+from app.utils.logger import logger
+
+# KEYS[1]: 状态哈希  KEYS[2]: 待刷新集合  KEYS[3]: 在线设备有序集合
+# ARGV: device_id, 状态, 心跳时间(毫秒), 设备主键, 用户id (后两个为空时要求Redis中已有该设备),
+#       用户在线集合的键前缀, 在线判定的截止时间(毫秒)
+# 用户在线集合的键依赖状态中的用户id，只能在脚本内拼接 (仅支持单实例Redis)
+# 返回: 0 Redis中没有该设备, 1 已记录, 2 已记录且设备上线, 3 已记录且设备离线,
+#       4 已记录且状态变化 (在线状态不变)
+_RECORD = """
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+local id, uid
+local changed = true
+if current then
+    local state = cjson.decode(current)
+    id = state.id
+    uid = state.u
+    changed = state.s ~= ARGV[2]
+elseif ARGV[4] ~= "" then
+    id = tonumber(ARGV[4])
+    uid = tonumber(ARGV[5])
+else
+    return 0
+end
+redis.call("HSET", KEYS[1], ARGV[1], cjson.encode({id = id, u = uid, s = ARGV[2], t = tonumber(ARGV[3])}))
+redis.call("SADD", KEYS[2], ARGV[1])
+
+local score = redis.call("ZSCORE", KEYS[3], ARGV[1])
+local was_online = score and tonumber(score) >= tonumber(ARGV[7])
+if ARGV[2] == "offline" then
+    redis.call("ZREM", KEYS[3], ARGV[1])
+    if uid then
+        redis.call("ZREM", ARGV[6] .. uid, ARGV[1])
+    end
+    if was_online then
+        return 3
+    end
+    if changed then
+        return 4
+    end
+    return 1
+end
+redis.call("ZADD", KEYS[3], ARGV[3], ARGV[1])
+if uid then
+    redis.call("ZADD", ARGV[6] .. uid, ARGV[3], ARGV[1])
+end
+if was_online then
+    if changed then
+        return 4
+    end
+    return 1
+end
+return 2
+"""
+
+# KEYS[1]: 在线设备有序集合  KEYS[2]: 状态哈希  KEYS[3]: 待刷新集合
+# ARGV: 截止时间(毫秒), 本批数量, 用户在线集合的键前缀
+# 把最近心跳早于截止时间的设备移出在线集合并标记为离线，返回 {device_id, 状态, ...}
+_EXPIRE = """
+local expired = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+local result = {}
+for _, device_id in ipairs(expired) do
+    redis.call("ZREM", KEYS[1], device_id)
+    local current = redis.call("HGET", KEYS[2], device_id)
+    if current then
+        local state = cjson.decode(current)
+        if state.u then
+            redis.call("ZREM", ARGV[3] .. state.u, device_id)
+        end
+        state.s = "offline"
+        current = cjson.encode(state)
+        redis.call("HSET", KEYS[2], device_id, current)
+        redis.call("SADD", KEYS[3], device_id)
+        table.insert(result, device_id)
+        table.insert(result, current)
+    end
+end
+return result
+"""
+
+# KEYS[1]: 待刷新集合  KEYS[2]: 刷新中集合 (上次刷新失败时仍有内容)
+_TAKE = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("SUNIONSTORE", KEYS[2], KEYS[2], KEYS[1])
+    redis.call("DEL", KEYS[1])
+end
+return redis.call("SMEMBERS", KEYS[2])
+"""
+
+
+class HeartbeatState(NamedTuple):
+    id: int
+    user_id: Optional[int]
+    status: str
+    last_seen: datetime
+    timestamp: int  # 最近心跳时间 (毫秒)
+
+    @property
+    def online(self) -> bool:
+        return self.status != "offline" and self.timestamp >= online_cutoff()
+
+
+def _parse(raw: Optional[bytes]) -> Optional[HeartbeatState]:
+    data = loads(raw)
+    if not data:
+        return None
+    return HeartbeatState(
+        int(data["id"]),
+        data.get("u"),
+        data["s"],
+        datetime.utcfromtimestamp(data["t"] / 1000),
+        int(data["t"])
+    )
+
+
+class HeartbeatBuffer:
+    """设备心跳的Redis缓冲"""
+
+    def __init__(self, flush_batch: int = settings.HEARTBEAT_FLUSH_BATCH):
+        self.flush_batch = flush_batch
+        self.state_key = make_key("hb:state")
+        self.dirty_key = make_key("hb:dirty")
+        self.flushing_key = make_key("hb:flushing")
+        self.lock_key = make_key("hb:flush_lock")
+        self._record = redis_client.register_script(_RECORD)
+        self._take = sync_redis_client.register_script(_TAKE)
+        self._expire = sync_redis_client.register_script(_EXPIRE)
+
+    async def record(self, device_id: str, status: str, device: Optional[models.Device] = None) -> bool:
+        """记录一次心跳，设备上线或离线时发布在线状态变化，上线、离线或状态变化时递增设备列表的版本号
+
+        Redis中没有该设备且未传入 device 时返回False，调用方需要从数据库确认设备存在
+        """
+        now = int(time.time() * 1000)
+        args = [device_id, status, now]
+        if device is not None:
+            args += [device.id, device.user_id if device.user_id is not None else ""]
+        else:
+            args += ["", ""]
+        args += [USER_PRESENCE_PREFIX, online_cutoff(now)]
+        result = await self._record(keys=[self.state_key, self.dirty_key, PRESENCE_KEY], args=args)
+        if result in (2, 3, 4):
+            user_id = device.user_id if device is not None else None
+            if user_id is None:
+                state = (await self.get_states([device_id])).get(device_id)
+                user_id = state.user_id if state is not None else None
+            if result != 4:
+                await publish_changes([PresenceChange(device_id, user_id, result == 2, now)])
+            if user_id is not None:
+                # 设备列表叠加了Redis中的状态，不等写回数据库就让旧ETag失效
+                await bump_resource_version("devices", user_id)
+        return bool(result)
+
+    async def get_states(self, device_ids: Iterable[str]) -> Dict[str, HeartbeatState]:
+        """批量读取设备的最近心跳状态，Redis不可用时返回空字典"""
+        device_ids = list(device_ids)
+        if not device_ids:
+            return {}
+        try:
+            raws = await redis_client.hmget(self.state_key, device_ids)
+        except Exception as e:
+            logger.warning(f"读取设备心跳状态失败: {str(e)}")
+            return {}
+        states = {}
+        for device_id, raw in zip(device_ids, raws):
+            state = _parse(raw)
+            if state is not None:
+                states[device_id] = state
+        return states
+
+    async def apply(self, devices: List[models.Device]) -> List[models.Device]:
+        """用Redis中较新的状态覆盖设备对象的 status / last_seen (不会标记为已修改)，并设置 is_online"""
+        states = await self.get_states(device.device_id for device in devices)
+        for device in devices:
+            state = states.get(device.device_id)
+            if state is None:
+                # 没有心跳记录的设备视为离线
+                device.is_online = False
+                continue
+            last_seen = device.__dict__.get("last_seen")
+            if last_seen is None or state.last_seen >= last_seen:
+                set_committed_value(device, "status", state.status)
+                set_committed_value(device, "last_seen", state.last_seen)
+            # is_online 不是数据库列，由在线状态计算
+            device.is_online = state.online
+        return devices
+
+    def expire(self) -> int:
+        """把心跳超时的设备批量标记为离线并发布离线事件，返回处理的设备数
+
+        状态写入待刷新集合，由下一次 flush() 写回数据库
+        """
+        cutoff = online_cutoff()
+        expired = 0
+        while True:
+            result = self._expire(
+                keys=[PRESENCE_KEY, self.state_key, self.dirty_key],
+                args=[cutoff, settings.PRESENCE_SWEEP_BATCH, USER_PRESENCE_PREFIX]
+            )
+            changes = []
+            for i in range(0, len(result), 2):
+                device_id = result[i].decode() if isinstance(result[i], bytes) else result[i]
+                state = _parse(result[i + 1])
+                changes.append(PresenceChange(device_id, state.user_id, False, state.timestamp))
+            publish_changes_sync(changes)
+            bump_resource_versions_sync("devices", (change.user_id for change in changes))
+            expired += len(changes)
+            if len(result) // 2 < settings.PRESENCE_SWEEP_BATCH:
+                return expired
+
+    def flush(self, db: Session) -> int:
+        """把待刷新的心跳批量写回数据库，返回更新的设备数"""
+        lock = sync_redis_client.lock(self.lock_key, timeout=settings.HEARTBEAT_FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            return 0
+        try:
+            device_ids = [
+                raw.decode() if isinstance(raw, bytes) else raw
+                for raw in self._take(keys=[self.dirty_key, self.flushing_key])
+            ]
+            flushed = 0
+            for start in range(0, len(device_ids), self.flush_batch):
+                chunk = device_ids[start:start + self.flush_batch]
+                raws = sync_redis_client.hmget(self.state_key, chunk)
+                states = {
+                    device_id: state
+                    for device_id, state in zip(chunk, map(_parse, raws))
+                    if state is not None
+                }
+                if states:
+                    self._write(db, states)
+                    flushed += len(states)
+            sync_redis_client.delete(self.flushing_key)
+            return flushed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # 刷新超过锁的有效期，锁已过期
+                pass
+
+    @staticmethod
+    def _write(db: Session, states: Dict[str, HeartbeatState]) -> None:
+        device_id = models.Device.device_id
+        stmt = (
+            update(models.Device)
+            .where(device_id.in_(list(states)))
+            .values(
+                status=case({k: s.status for k, s in states.items()}, value=device_id),
+                last_seen=case({k: s.last_seen for k, s in states.items()}, value=device_id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(stmt)
+        # 批量UPDATE不经过ORM对象，手动登记写入以更新设备列表的ETag版本号
+        record_writes(db, [
+            WriteEvent(models.Device, state.id, state.user_id, "update")
+            for state in states.values()
+        ])
+        db.commit()
+
+heartbeat_buffer = HeartbeatBuffer()
@@ -0,0 +1,197 @@
+"""
+幂等请求模块
+
+客户端超时重试写请求时，通过 Idempotency-Key 请求头避免重复执行：
+1. 第一个请求在Redis中占用该键 (处理中)，完成后保存响应，保留 IDEMPOTENCY_TTL 秒
+2. 相同键的重复请求直接返回保存的响应
+3. 并发的重复请求等待第一个请求完成后返回其响应，而不是重新执行
+4. 同一个键对应的请求内容不同时返回422；执行失败时释放该键，允许客户端重试
+"""
+
+import asyncio
+import hashlib
+import uuid
+from typing import Any, Dict, Optional
+import orjson
+from fastapi import HTTPException, Response, status
+from app.cache.redis import make_key, redis_client
+from app.core.config import settings
+from app.utils.logger import logger
+
+# KEYS[1]: 幂等键  ARGV: 请求指纹, 占用者token, 占用超时(毫秒)
+# 键不存在时占用并返回空表，否则返回 {state, 指纹, 状态码, 响应体, 响应类型}
+_CLAIM = """
+local current = redis.call("HMGET", KEYS[1], "state", "fp", "status", "body", "media_type")
+if current[1] then
+    return current
+end
+redis.call("HSET", KEYS[1], "state", "pending", "fp", ARGV[1], "token", ARGV[2])
+redis.call("PEXPIRE", KEYS[1], ARGV[3])
+return {}
+"""
+
+# KEYS[1]: 幂等键  ARGV: 占用者token, 状态码, 响应体, 响应类型, 保留时间(秒)
+_COMPLETE = """
+if redis.call("HGET", KEYS[1], "token") ~= ARGV[1] then
+    return 0
+end
+redis.call("HSET", KEYS[1], "state", "done", "status", ARGV[2], "body", ARGV[3], "media_type", ARGV[4])
+redis.call("HDEL", KEYS[1], "token")
+redis.call("EXPIRE", KEYS[1], ARGV[5])
+return 1
+"""
+
+# KEYS[1]: 幂等键  ARGV[1]: 占用者token
+_RELEASE = """
+if redis.call("HGET", KEYS[1], "token") == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _text(value: Any) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """请求指纹：方法、路径和规范化(键排序)的JSON请求体"""
+    try:
+        body = orjson.dumps(orjson.loads(body), option=orjson.OPT_SORT_KEYS)
+    except orjson.JSONDecodeError:
+        pass
+    digest = hashlib.sha256(f"{method} {path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotentRequest:
+    """一次带幂等键的请求
+
+    replay 不为None时应直接返回它；否则执行请求后调用 complete() 保存响应，
+    执行失败时调用 release()。store 为None (未带幂等键或Redis不可用) 时两者都不做任何事
+    """
+
+    def __init__(
+        self,
+        store: Optional["IdempotencyStore"] = None,
+        key: str = "",
+        token: str = "",
+        replay: Optional[Response] = None
+    ):
+        self.store = store
+        self.key = key
+        self.token = token
+        self.replay = replay
+
+    async def complete(self, response: Response) -> Response:
+        """保存响应，后续相同键的请求直接返回它"""
+        if self.store is not None and self.replay is None:
+            await self.store.complete(self.key, self.token, response)
+        return response
+
+    async def release(self) -> None:
+        if self.store is not None and self.replay is None:
+            await self.store.release(self.key, self.token)
+
+
+class IdempotencyStore:
+    """基于Redis的幂等键存储"""
+
+    key_prefix = "idem:"
+
+    def __init__(
+        self,
+        ttl: int = settings.IDEMPOTENCY_TTL,
+        lock_timeout: int = settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        wait_timeout: float = settings.IDEMPOTENCY_WAIT_TIMEOUT
+    ):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        # 本进程内正在处理的键，完成时立即唤醒等待者，不必等到下一次轮询
+        self._local: Dict[str, asyncio.Event] = {}
+        self._claim = redis_client.register_script(_CLAIM)
+        self._complete = redis_client.register_script(_COMPLETE)
+        self._release = redis_client.register_script(_RELEASE)
+
+    def key_for(self, scope: str, user_id: int, idempotency_key: str) -> str:
+        return make_key(f"{self.key_prefix}{scope}:{user_id}:{idempotency_key}")
+
+    async def begin(self, key: str, fingerprint: str) -> IdempotentRequest:
+        """占用幂等键；键已被占用时等待其完成并返回保存的响应"""
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        interval = 0.05
+        while True:
+            try:
+                current = await self._claim(keys=[key], args=[fingerprint, token, self.lock_timeout * 1000])
+            except Exception as e:
+                # Redis不可用时照常执行请求，不做幂等保护
+                logger.warning(f"幂等键检查失败 {key}: {str(e)}")
+                return IdempotentRequest()
+            if not current:
+                self._local[key] = asyncio.Event()
+                return IdempotentRequest(self, key, token)
+
+            state, stored_fp, status_code, body, media_type = (_text(v) for v in current)
+            if stored_fp != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key 已用于内容不同的请求"
+                )
+            if state == "done":
+                replay = Response(
+                    content=body,
+                    status_code=int(status_code),
+                    media_type=media_type or None,
+                    headers={REPLAYED_HEADER: "true"}
+                )
+                return IdempotentRequest(replay=replay)
+
+            # 第一个请求仍在处理中
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="相同 Idempotency-Key 的请求正在处理中，请稍后重试"
+                )
+            event = self._local.get(key)
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), min(interval, remaining))
+                else:
+                    await asyncio.sleep(min(interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+            interval = min(interval * 2, 0.5)
+
+    def _wake(self, key: str) -> None:
+        event = self._local.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def complete(self, key: str, token: str, response: Response) -> None:
+        try:
+            stored = await self._complete(
+                keys=[key],
+                args=[token, response.status_code, response.body, response.media_type or "", self.ttl]
+            )
+            if not stored:
+                logger.warning(f"幂等键在请求完成前已过期 {key}")
+        except Exception as e:
+            logger.error(f"保存幂等响应失败 {key}: {str(e)}")
+        finally:
+            self._wake(key)
+
+    async def release(self, key: str, token: str) -> None:
+        try:
+            await self._release(keys=[key], args=[token])
+        except Exception as e:
+            logger.error(f"释放幂等键失败 {key}: {str(e)}")
+        finally:
+            self._wake(key)
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,15 @@
+"""
+模型缓存模块
+
+按主键缓存ORM对象的两级缓存实例：
+1. 服务层通过 get_or_load 读取
+2. 创建时按模型登记，任何进程中提交的写入都会失效对应的缓存并广播
+3. API和Celery worker都需要导入本模块，否则worker中的写入不会使缓存失效
+"""
+
+from app import models
+from app.cache.tiered import TieredCache
+
+account_cache = TieredCache("account", model=models.Account)
+team_cache = TieredCache("team", model=models.Team)
+content_cache = TieredCache("content", model=models.Content)
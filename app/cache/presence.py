@@ -0,0 +1,76 @@
+"""
+设备在线状态模块
+
+在线状态由心跳维护，保存在Redis有序集合中 (成员为 device_id，分数为最近心跳时间，毫秒)：
+1. presence:all 包含所有在线设备，清理任务按分数找出超时的设备
+2. presence:user:{user_id} 包含用户的在线设备，按分数范围查询，O(log n)
+3. 设备上线、离线 (主动断开或心跳超时) 时发布到 PRESENCE_CHANNEL 频道
+
+心跳写入和超时清理见 app.cache.heartbeat
+"""
+
+import time
+from typing import Iterable, List, NamedTuple, Optional
+from app.cache.redis import dumps, make_key, redis_client, sync_redis_client
+from app.core.config import settings
+from app.utils.logger import logger
+
+PRESENCE_KEY = make_key("presence:all")
+USER_PRESENCE_PREFIX = make_key("presence:user:")
+
+
+class PresenceChange(NamedTuple):
+    device_id: str
+    user_id: Optional[int]
+    online: bool
+    timestamp: int  # 毫秒
+
+
+def user_presence_key(user_id: int) -> str:
+    return f"{USER_PRESENCE_PREFIX}{user_id}"
+
+def presence_channel() -> str:
+    return make_key(settings.PRESENCE_CHANNEL)
+
+def online_cutoff(now_ms: Optional[int] = None) -> int:
+    """最近心跳早于该时间(毫秒)的设备视为离线"""
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    return now_ms - int(settings.PRESENCE_TIMEOUT * 1000)
+
+def _payload(change: PresenceChange) -> str:
+    return dumps({
+        "device_id": change.device_id,
+        "user_id": change.user_id,
+        "status": "online" if change.online else "offline",
+        "timestamp": change.timestamp,
+    })
+
+async def online_device_ids(user_id: int) -> List[str]:
+    """用户当前在线的设备id，按最近心跳时间从新到旧"""
+    members = await redis_client.zrevrangebyscore(user_presence_key(user_id), "+inf", online_cutoff())
+    return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+async def publish_changes(changes: Iterable[PresenceChange]) -> None:
+    changes = list(changes)
+    if not changes:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for change in changes:
+                pipe.publish(presence_channel(), _payload(change))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"发布设备在线状态变化失败: {str(e)}")
+
+def publish_changes_sync(changes: Iterable[PresenceChange]) -> None:
+    changes = list(changes)
+    if not changes:
+        return
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for change in changes:
+                pipe.publish(presence_channel(), _payload(change))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"发布设备在线状态变化失败: {str(e)}")
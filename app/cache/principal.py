@@ -0,0 +1,52 @@
+"""
+认证用户缓存模块
+
+缓存已认证用户的精简快照，避免每个请求都查询users表：
+1. 一级缓存：进程内TTL/LRU
+2. 二级缓存：Redis，多个worker共享
+3. 用户更新或禁用时失效，经 TieredCache 的失效广播通知所有worker清除本地副本
+"""
+
+from typing import Any, Dict, Optional
+from app import schemas
+from app.cache.tiered import TieredCache
+from app.core.config import settings
+
+class PrincipalCache:
+    """认证用户两级缓存"""
+
+    def __init__(self):
+        self.cache = TieredCache(
+            "principal",
+            ttl=settings.PRINCIPAL_CACHE_TTL,
+            local_ttl=min(settings.CACHE_LOCAL_TTL, settings.PRINCIPAL_CACHE_TTL),
+            local_maxsize=settings.PRINCIPAL_CACHE_MAXSIZE
+        )
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        # token中的用户id为字符串，统一按字符串作为键
+        return str(user_id)
+
+    async def get(self, user_id: Any) -> Optional[schemas.UserPrincipal]:
+        """依次从进程内缓存和Redis获取用户快照"""
+        data = await self.cache.get(self._key(user_id))
+        if data is None:
+            return None
+        return schemas.UserPrincipal.model_validate(data)
+
+    async def set(self, user: Any) -> schemas.UserPrincipal:
+        """根据用户对象写入两级缓存"""
+        principal = schemas.UserPrincipal.model_validate(user)
+        await self.cache.set(self._key(principal.id), principal.model_dump())
+        return principal
+
+    async def invalidate(self, user_id: Any) -> None:
+        """用户更新或禁用时清除缓存，所有worker的本地副本都会被清除"""
+        await self.cache.invalidate(self._key(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        return self.cache.stats()
+
+principal_cache = PrincipalCache()
@@ -2,21 +2,168 @@
 Redis缓存配置模块
 
 管理Redis连接和缓存操作：
-1. 连接池管理
-2. 键值操作封装
-3. 缓存策略配置
+1. 连接池管理 (redis.asyncio 连接池，接口中使用不会阻塞事件循环)
+2. 键值操作封装 (统一的键前缀和JSON序列化)
+3. 批量操作 (mget / mset / pipeline)
+4. 同步接口 (SyncRedisCache，供Celery worker等同步代码使用)
+5. 异步命令计入请求耗时统计 (Server-Timing)
 """
 
-from redis import Redis
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Mapping, Optional
+from redis import ConnectionPool, Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
 from app.core.config import settings
+from app.core.timing import record_redis
+
+_pool_options = dict(
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=30
+)
+
+
+class TimedPipeline(AsyncPipeline):
+    """整个pipeline的执行计为一次Redis调用"""
+
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            record_redis(time.perf_counter() - start)
+
+
+class TimedRedis(AsyncRedis):
+    """记录命令耗时的异步客户端"""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            record_redis(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+redis_pool = AsyncConnectionPool.from_url(settings.REDIS_URL, **_pool_options)
+redis_client = TimedRedis(connection_pool=redis_pool)
+
+sync_redis_pool = ConnectionPool.from_url(settings.REDIS_URL, **_pool_options)
+sync_redis_client = Redis(connection_pool=sync_redis_pool)
+
+def make_key(key: str) -> str:
+    """加上应用的键前缀"""
+    return f"{settings.REDIS_KEY_PREFIX}{key}"
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> str:
+    """序列化缓存值"""
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+def loads(raw: Optional[bytes]) -> Any:
+    """反序列化缓存值，不存在时返回None"""
+    if raw is None:
+        return None
+    return json.loads(raw)
 
-redis_client = Redis.from_url(settings.REDIS_URL)
 
 class RedisCache:
+    """异步缓存操作，键自动加前缀，值以JSON保存"""
+
+    key = staticmethod(make_key)
+
+    @staticmethod
+    async def get(key: str) -> Any:
+        return loads(await redis_client.get(make_key(key)))
+
+    @staticmethod
+    async def set(key: str, value: Any, expire: int = None):
+        await redis_client.set(make_key(key), dumps(value), ex=expire)
+
     @staticmethod
-    async def get(key: str) -> str:
-        return redis_client.get(key)
-        
+    async def delete(*keys: str):
+        if keys:
+            await redis_client.delete(*[make_key(k) for k in keys])
+
+    @staticmethod
+    async def mget(keys: Iterable[str]) -> List[Any]:
+        keys = [make_key(k) for k in keys]
+        if not keys:
+            return []
+        return [loads(raw) for raw in await redis_client.mget(keys)]
+
+    @staticmethod
+    async def mset(mapping: Mapping[str, Any], expire: int = None):
+        if not mapping:
+            return
+        if expire is None:
+            await redis_client.mset({make_key(k): dumps(v) for k, v in mapping.items()})
+            return
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for k, v in mapping.items():
+                pipe.set(make_key(k), dumps(v), ex=expire)
+            await pipe.execute()
+
+    @staticmethod
+    def pipeline(transaction: bool = True):
+        """获取pipeline，键需要自行用 RedisCache.key() 加前缀"""
+        return redis_client.pipeline(transaction=transaction)
+
+
+class SyncRedisCache:
+    """同步缓存操作，与 RedisCache 使用相同的键前缀和序列化方式"""
+
+    key = staticmethod(make_key)
+
+    @staticmethod
+    def get(key: str) -> Any:
+        return loads(sync_redis_client.get(make_key(key)))
+
+    @staticmethod
+    def set(key: str, value: Any, expire: int = None):
+        sync_redis_client.set(make_key(key), dumps(value), ex=expire)
+
+    @staticmethod
+    def delete(*keys: str):
+        if keys:
+            sync_redis_client.delete(*[make_key(k) for k in keys])
+
+    @staticmethod
+    def mget(keys: Iterable[str]) -> List[Any]:
+        keys = [make_key(k) for k in keys]
+        if not keys:
+            return []
+        return [loads(raw) for raw in sync_redis_client.mget(keys)]
+
+    @staticmethod
+    def mset(mapping: Mapping[str, Any], expire: int = None):
+        if not mapping:
+            return
+        if expire is None:
+            sync_redis_client.mset({make_key(k): dumps(v) for k, v in mapping.items()})
+            return
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for k, v in mapping.items():
+                pipe.set(make_key(k), dumps(v), ex=expire)
+            pipe.execute()
+
     @staticmethod
-    async def set(key: str, value: str, expire: int = None):
-        redis_client.set(key, value, ex=expire) 
\ No newline at end of file
+    def pipeline(transaction: bool = True):
+        """获取pipeline，键需要自行用 SyncRedisCache.key() 加前缀"""
+        return sync_redis_client.pipeline(transaction=transaction)
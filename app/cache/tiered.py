@@ -0,0 +1,228 @@
+"""
+两级缓存模块
+
+进程内LRU + Redis 的两级缓存：
+1. 一级：进程内TTL/LRU，命中时没有网络开销
+2. 二级：Redis，多个worker共享
+3. 失效：删除Redis中的值并通过 pub/sub 广播，所有worker清除本地副本
+4. ORM对象按列保存，读取时还原为不绑定会话的模型实例
+"""
+
+import asyncio
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+from sqlalchemy import Date, DateTime, inspect
+from app.cache.local import TTLCache
+from app.cache.redis import RedisCache, SyncRedisCache, dumps, loads, make_key, redis_client, sync_redis_client
+from app.core.config import settings
+from app.core.events import WriteEvent, register_write_listener
+from app.utils.logger import logger
+
+def model_to_dict(obj: Any) -> Dict[str, Any]:
+    """取出ORM对象已加载的列值"""
+    state = inspect(obj)
+    values = state.dict
+    return {
+        attr.key: values[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in values
+    }
+
+def model_from_dict(model: Type, data: Dict[str, Any]) -> Any:
+    """由列值还原ORM对象 (不绑定会话，只用于读取)"""
+    values = dict(data)
+    for attr in inspect(model).column_attrs:
+        value = values.get(attr.key)
+        if not isinstance(value, str):
+            continue
+        column_type = attr.columns[0].type
+        if isinstance(column_type, DateTime):
+            values[attr.key] = datetime.fromisoformat(value)
+        elif isinstance(column_type, Date):
+            values[attr.key] = date.fromisoformat(value)
+    return model(**values)
+
+
+class TieredCache:
+    """两级缓存
+
+    指定 model 时按ORM对象缓存，get 返回还原后的模型实例
+    """
+
+    _registry: Dict[str, "TieredCache"] = {}
+    _models: Dict[Type, "TieredCache"] = {}
+
+    def __init__(
+        self,
+        namespace: str,
+        model: Optional[Type] = None,
+        ttl: int = settings.CACHE_TTL,
+        local_ttl: int = settings.CACHE_LOCAL_TTL,
+        local_maxsize: int = settings.CACHE_LOCAL_MAXSIZE
+    ):
+        self.namespace = namespace
+        self.model = model
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.redis_hits = 0
+        self.redis_misses = 0
+        TieredCache._registry[namespace] = self
+        if model is not None:
+            TieredCache._models[model] = self
+
+    def _key(self, key: Any) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _decode(self, data: Any) -> Any:
+        if data is None or self.model is None:
+            return data
+        return model_from_dict(self.model, data)
+
+    def _encode(self, value: Any) -> Any:
+        if self.model is None:
+            return value
+        return model_to_dict(value)
+
+    async def get(self, key: Any) -> Any:
+        """依次查询本地和Redis，都未命中时返回None"""
+        data = self.local.get(key)
+        if data is not None:
+            return self._decode(data)
+        try:
+            data = await RedisCache.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"读取缓存失败 {self.namespace}:{key}: {str(e)}")
+            data = None
+        if data is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        self.local.set(key, data)
+        return self._decode(data)
+
+    async def set(self, key: Any, value: Any) -> None:
+        """写入两级缓存"""
+        data = self._encode(value)
+        self.local.set(key, data)
+        try:
+            await RedisCache.set(self._key(key), data, expire=self.ttl)
+        except Exception as e:
+            logger.warning(f"写入缓存失败 {self.namespace}:{key}: {str(e)}")
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """缓存未命中时调用loader加载并回填"""
+        value = await self.get(key)
+        if value is not None:
+            return value
+        value = await loader()
+        if value is not None:
+            await self.set(key, value)
+        return value
+
+    def invalidate_local(self, *keys: Any) -> None:
+        for key in keys:
+            self.local.delete(key)
+
+    def _message(self, keys) -> str:
+        return dumps({"ns": self.namespace, "keys": [str(k) for k in keys]})
+
+    async def invalidate(self, *keys: Any) -> None:
+        """删除缓存并通知其他worker"""
+        self.invalidate_local(*keys)
+        try:
+            await RedisCache.delete(*[self._key(k) for k in keys])
+            await redis_client.publish(invalidation_channel(), self._message(keys))
+        except Exception as e:
+            logger.warning(f"缓存失效广播失败 {self.namespace}: {str(e)}")
+
+    def invalidate_sync(self, *keys: Any) -> None:
+        """同步版本，供Celery等同步代码使用"""
+        self.invalidate_local(*keys)
+        try:
+            SyncRedisCache.delete(*[self._key(k) for k in keys])
+            sync_redis_client.publish(invalidation_channel(), self._message(keys))
+        except Exception as e:
+            logger.warning(f"缓存失效广播失败 {self.namespace}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """各级缓存的命中/未命中/淘汰统计，hit_ratio 为任一级命中的比例"""
+        local = self.local.stats()
+        lookups = local["hits"] + local["misses"]
+        hits = local["hits"] + self.redis_hits
+        return {
+            "local": local,
+            "redis": {"hits": self.redis_hits, "misses": self.redis_misses},
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    @classmethod
+    def all_stats(cls) -> Dict[str, Any]:
+        return {name: cache.stats() for name, cache in cls._registry.items()}
+
+
+def invalidation_channel() -> str:
+    return make_key(settings.CACHE_INVALIDATION_CHANNEL)
+
+
+def _group_by_cache(events: List[WriteEvent]) -> Dict[TieredCache, List[Any]]:
+    groups: Dict[TieredCache, List[Any]] = {}
+    for write_event in events:
+        cache = TieredCache._models.get(write_event.model)
+        if cache is not None and write_event.action != "insert":
+            groups.setdefault(cache, []).append(write_event.pk)
+    return groups
+
+async def _invalidate_written(events: List[WriteEvent]) -> None:
+    for cache, keys in _group_by_cache(events).items():
+        await cache.invalidate(*keys)
+
+def _invalidate_written_sync(events: List[WriteEvent]) -> None:
+    for cache, keys in _group_by_cache(events).items():
+        cache.invalidate_sync(*keys)
+
+register_write_listener(_invalidate_written, _invalidate_written_sync)
+
+
+class CacheInvalidationListener:
+    """订阅失效广播，清除本进程的一级缓存"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(invalidation_channel())
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = loads(message["data"])
+                    cache = TieredCache._registry.get(payload.get("ns"))
+                    if cache is None:
+                        continue
+                    for key in payload.get("keys", []):
+                        # 广播中的键为字符串，本地缓存可能以int为键
+                        cache.invalidate_local(key, int(key) if key.isdigit() else key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"缓存失效订阅中断，稍后重连: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+invalidation_listener = CacheInvalidationListener()
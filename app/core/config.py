@@ -11,7 +11,7 @@
 使用 Pydantic 进行配置验证，确保所有配置项的类型正确性
 """
 
-from typing import List, Union
+from typing import Any, Dict, List, Union
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 import logging
@@ -34,6 +34,12 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8天
     ALGORITHM: str = "HS256"  # JWT加密算法
+
+    # 密码哈希设置
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # 修改后用户下次登录时自动重新哈希
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread 或 process
+    PASSWORD_HASH_WORKERS: int = 4  # 执行器大小，同时也是并发上限
+    PASSWORD_HASH_MAX_QUEUE: int = 100  # 等待中的哈希任务上限，超出直接拒绝
     
     # BACKEND_CORS_ORIGINS is a comma-separated list of origins
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -58,6 +64,30 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = "social_media_analytics"
 
+    # MySQL只读副本 (逗号分隔的 host 或 host:port，账号密码与主库相同)
+    MYSQL_REPLICA_HOSTS: List[str] = []
+    DB_REPLICA_STRATEGY: str = "round_robin"  # round_robin 或 least_connections
+    DB_READ_YOUR_WRITES_SECONDS: int = 5  # 用户写入后该时间内的读请求仍走主库
+
+    @validator("MYSQL_REPLICA_HOSTS", pre=True)
+    def assemble_replica_hosts(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    # 连接池配置，按进程角色区分 (api / worker / scheduler)
+    # 环境变量示例: DB_POOL_CONFIG='{"worker": {"pool_size": 2, "max_overflow": 0}}'
+    DB_ROLE: str = "api"
+    DB_POOL_CONFIG: Dict[str, Dict[str, Any]] = {
+        "api": {"pool_size": 20, "max_overflow": 10, "pool_recycle": 1800, "pool_timeout": 30},
+        "worker": {"pool_size": 5, "max_overflow": 5, "pool_recycle": 1800, "pool_timeout": 30},
+        "scheduler": {"pool_size": 2, "max_overflow": 2, "pool_recycle": 1800, "pool_timeout": 30},
+    }
+
+    # 异步驱动 (用于 async def 接口，避免阻塞事件循环)
+    MYSQL_ASYNC_DRIVER: str = "aiomysql"
+    POSTGRES_ASYNC_DRIVER: str = "asyncpg"
+
     @property
     def MYSQL_DATABASE_URI(self) -> str:
         """MySQL连接URI"""
@@ -68,6 +98,34 @@ class Settings(BaseSettings):
         """PostgreSQL连接URI"""
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def MYSQL_ASYNC_DATABASE_URI(self) -> str:
+        """MySQL异步连接URI"""
+        return f"mysql+{self.MYSQL_ASYNC_DRIVER}://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+
+    @property
+    def POSTGRES_ASYNC_DATABASE_URI(self) -> str:
+        """PostgreSQL异步连接URI"""
+        return f"postgresql+{self.POSTGRES_ASYNC_DRIVER}://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    def _mysql_replica_uris(self, driver: str) -> List[str]:
+        uris = []
+        for host in self.MYSQL_REPLICA_HOSTS:
+            if ":" not in host:
+                host = f"{host}:{self.MYSQL_PORT}"
+            uris.append(f"mysql+{driver}://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{host}/{self.MYSQL_DB}")
+        return uris
+
+    @property
+    def MYSQL_REPLICA_URIS(self) -> List[str]:
+        """MySQL只读副本连接URI"""
+        return self._mysql_replica_uris("pymysql")
+
+    @property
+    def MYSQL_ASYNC_REPLICA_URIS(self) -> List[str]:
+        """MySQL只读副本异步连接URI"""
+        return self._mysql_replica_uris(self.MYSQL_ASYNC_DRIVER)
+
     # S3 配置
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
@@ -75,6 +133,103 @@ class Settings(BaseSettings):
     
     # Redis 配置
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_KEY_PREFIX: str = "smm:"
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_SOCKET_TIMEOUT: float = 5.0  # 秒
+    REDIS_CONNECT_TIMEOUT: float = 2.0  # 秒
+
+    # 两级缓存配置 (进程内LRU + Redis)
+    CACHE_TTL: int = 300  # Redis中的过期时间(秒)
+    CACHE_LOCAL_TTL: int = 30  # 进程内的过期时间(秒)，兜底防止失效广播丢失
+    CACHE_LOCAL_MAXSIZE: int = 10000
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+
+    # 认证用户缓存配置
+    PRINCIPAL_CACHE_TTL: int = 300  # 秒
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    PRINCIPAL_CACHE_SKIP_DB: bool = True  # 缓存命中时不再查询数据库
+
+    # 请求耗时统计配置
+    TIMING_ENABLED: bool = True
+    TIMING_HEADER_ENABLED: bool = True  # 是否返回 Server-Timing 响应头
+    REQUEST_LATENCY_BUDGET_MS: int = 500  # 超过时记录慢请求警告
+    REQUEST_QUERY_BUDGET: int = 20  # 单个请求的SQL条数上限，超过时记录警告
+
+    # 批量请求配置
+    BATCH_MAX_REQUESTS: int = 20  # 单个批量请求最多包含的子请求数
+    BATCH_MAX_CONCURRENCY: int = 8  # 同时执行的子请求数
+
+    # 设备心跳配置
+    HEARTBEAT_FLUSH_INTERVAL: float = 5.0  # 心跳从Redis批量写回MySQL的间隔(秒)
+    HEARTBEAT_FLUSH_BATCH: int = 1000  # 每条批量UPDATE包含的设备数
+    HEARTBEAT_FLUSH_LOCK_TIMEOUT: int = 60  # 刷新锁的有效期(秒)，防止多个刷新任务同时执行
+
+    # 设备在线状态配置
+    PRESENCE_TIMEOUT: float = 90.0  # 超过该时间(秒)没有心跳的设备视为离线
+    PRESENCE_SWEEP_INTERVAL: float = 15.0  # 超时清理任务的执行间隔(秒)
+    PRESENCE_SWEEP_BATCH: int = 500  # 每次脚本调用最多标记的离线设备数
+    PRESENCE_CHANNEL: str = "devices:presence"  # 发布上线/离线事件的Redis频道
+
+    # 设备指标配置 (PostgreSQL 分析库，表结构见 app/db/sql/postgres_device_metrics.sql)
+    DEVICE_METRICS_BATCH_SIZE: int = 1000  # 缓冲达到该行数时立即写入，也是每条INSERT的行数
+    DEVICE_METRICS_FLUSH_INTERVAL: float = 5.0  # 缓冲定时写入的间隔(秒)
+    DEVICE_METRICS_MAX_BUFFER: int = 100000  # 写入失败时缓冲的最大行数，超过后丢弃新数据
+    DEVICE_METRICS_MAX_PER_HEARTBEAT: int = 50  # 单次心跳最多记录的指标数
+    DEVICE_METRICS_ROLLUP_INTERVAL: float = 60.0  # 汇总任务的执行间隔(秒)
+    DEVICE_METRICS_ROLLUP_DELAY: int = 30  # 汇总时跳过最近的秒数，等待各进程缓冲写入
+    DEVICE_METRICS_MINUTE_RANGE_HOURS: int = 6  # 查询跨度不超过该小时数时使用1分钟汇总
+    DEVICE_METRICS_MAX_POINTS: int = 5000  # 单次查询最多返回的数据点
+    DEVICE_METRICS_RAW_RETENTION_DAYS: int = 7
+    DEVICE_METRICS_MINUTE_RETENTION_DAYS: int = 30
+
+    # 设备配置同步
+    DEVICE_CONFIG_HISTORY: int = 20  # 保留的配置版本数，更旧版本的设备同步时返回完整配置
+    DEVICE_CONFIG_VERSION_TTL: int = 86400  # Redis中缓存设备当前配置版本号的时间(秒)
+
+    # 设备连接配置 (/devices/ws)
+    DEVICE_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 365  # 设备令牌有效期
+    DEVICE_WS_IDLE_TIMEOUT: float = 90.0  # 超过该时间(秒)没有收到任何帧时断开
+    DEVICE_WS_SEND_TIMEOUT: float = 5.0  # 向设备推送一条命令的最长时间(秒)
+    DEVICE_COMMAND_CHANNEL: str = "devices:commands"  # 跨worker转发设备命令的Redis频道
+
+    # 幂等请求配置 (Idempotency-Key 请求头)
+    IDEMPOTENCY_TTL: int = 86400  # 保存响应的时间(秒)，客户端在此时间内重试都会得到同一个响应
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 60  # 处理中状态的最长保留时间(秒)，防止进程崩溃后键被永久占用
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0  # 并发的重复请求最多等待第一个请求完成的时间(秒)
+    PUBLISH_DEDUPE_TTL: int = 600  # 同一内容在此时间(秒)内只投递一次发布任务
+
+    # 限流配置: 路由名 -> 用户等级(anonymous / default / superuser) -> [桶容量, 每秒补充的令牌数]
+    # 未配置的等级使用 default；环境变量示例: RATE_LIMITS='{"export": {"default": [5, 0.02]}}'
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, Dict[str, List[float]]] = {
+        "auth_login": {"default": [10, 0.2]},
+        "analytics_report": {"default": [10, 0.1], "superuser": [60, 1]},
+        "export": {"default": [5, 0.02], "superuser": [20, 0.1]},
+    }
+    RATE_LIMIT_LEASE_SIZE: int = 5  # 令牌充足时每次从Redis预支的令牌数
+    RATE_LIMIT_LEASE_TTL: float = 1.0  # 预支令牌在进程内的有效期(秒)，过期未用完的令牌归还到桶中
+    # 可信的反向代理 (逗号分隔的IP或网段)，来自这些地址的请求按 X-Forwarded-For 识别客户端IP
+    TRUSTED_PROXIES: List[str] = []
+
+    @validator("TRUSTED_PROXIES", pre=True)
+    def assemble_trusted_proxies(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    # 监控指标配置 (多进程部署时还需设置环境变量 PROMETHEUS_MULTIPROC_DIR)
+    METRICS_ENABLED: bool = True
+
+    # 响应压缩配置
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"]  # 客户端权重相同时的优先顺序
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # 流式响应累计到该字节数 (压缩前) 或距上次刷新超过该秒数时才刷新压缩器，逐块刷新会降低压缩率
+    COMPRESSION_FLUSH_SIZE: int = 65536
+    COMPRESSION_FLUSH_INTERVAL: float = 1.0
     
     # 社交媒体平台配置
     TIKTOK_APP_KEY: str = ""
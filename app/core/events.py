@@ -0,0 +1,94 @@
+"""
+事件管理模块
+
+监听ORM会话的写入，在事务提交后通知订阅者：
+1. 刷新(flush)时记录被新增/修改/删除的对象
+2. 提交(commit)后把写入事件分发给订阅者，回滚时丢弃
+3. 有事件循环时异步分发，Celery等同步环境下同步分发
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.logger import logger
+
+class WriteEvent(NamedTuple):
+    """一次写入"""
+    model: type
+    pk: Any
+    owner_id: Any  # user_id / owner_id，没有时为None
+    action: str  # insert / update / delete
+
+
+AsyncHandler = Callable[[List[WriteEvent]], Awaitable[None]]
+SyncHandler = Callable[[List[WriteEvent]], None]
+
+_listeners: List[tuple] = []
+_pending_tasks: Set[asyncio.Task] = set()
+
+def register_write_listener(handler: AsyncHandler, sync_handler: Optional[SyncHandler] = None) -> None:
+    """订阅提交后的写入事件
+
+    handler 在事件循环中以任务方式执行；没有事件循环时调用 sync_handler
+    """
+    _listeners.append((handler, sync_handler))
+
+async def _run_handler(handler: AsyncHandler, events: List[WriteEvent]) -> None:
+    try:
+        await handler(events)
+    except Exception as e:
+        logger.error(f"写入事件处理失败: {str(e)}")
+
+def _owner_of(state) -> Any:
+    values = state.dict
+    return values.get("user_id", values.get("owner_id"))
+
+def _to_event(obj: Any, action: str) -> Optional[WriteEvent]:
+    state = inspect(obj)
+    pk = state.dict.get("id")
+    if pk is None:
+        return None
+    return WriteEvent(type(obj), pk, _owner_of(state), action)
+
+@event.listens_for(Session, "after_flush")
+def _collect_writes(session: Session, flush_context) -> None:
+    events = session.info.setdefault("write_events", [])
+    for action, objs in (
+        ("insert", session.new),
+        ("update", session.dirty),
+        ("delete", session.deleted),
+    ):
+        for obj in objs:
+            write_event = _to_event(obj, action)
+            if write_event is not None:
+                events.append(write_event)
+
+def record_writes(session: Session, writes: List[WriteEvent]) -> None:
+    """登记不经过ORM对象的写入 (如批量UPDATE)，提交后与普通写入一起分发"""
+    session.info.setdefault("write_events", []).extend(writes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session: Session) -> None:
+    session.info.pop("write_events", None)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_writes(session: Session) -> None:
+    events = session.info.pop("write_events", None)
+    if not events or not _listeners:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    for handler, sync_handler in _listeners:
+        try:
+            if loop is not None:
+                task = loop.create_task(_run_handler(handler, list(events)))
+                _pending_tasks.add(task)
+                task.add_done_callback(_pending_tasks.discard)
+            elif sync_handler is not None:
+                sync_handler(list(events))
+        except Exception as e:
+            logger.error(f"写入事件分发失败: {str(e)}")
@@ -0,0 +1,224 @@
+"""
+监控指标模块
+
+Prometheus 指标：
+1. HTTP请求耗时直方图 (按方法、路由模板、状态码)
+2. 数据库连接池使用情况 (每个引擎的 checked-out / overflow，在连接借出和归还时更新)
+3. Celery 队列长度 (task_routes 中配置的队列)
+4. 社交平台API调用耗时 (按平台、操作、结果)
+5. 密码哈希执行器的排队深度和耗时 (PasswordHasher.stats)
+6. 两级缓存各命名空间的命中、未命中和淘汰 (TieredCache.all_stats)
+
+多进程部署 (多个uvicorn worker) 时需设置环境变量 PROMETHEUS_MULTIPROC_DIR，
+各进程把指标写入该目录，/metrics 汇总所有进程的数据
+"""
+
+import functools
+import os
+import threading
+import time
+from typing import Callable, Set, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from app.cache.redis import sync_redis_client
+from app.cache.tiered import TieredCache
+from app.core.security import password_hasher
+from app.db.session import engine_registry
+from app.utils.logger import logger
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP请求处理耗时",
+    ["method", "route", "status"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "连接池中已借出的连接数",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "借出的连接中超出 pool_size 的部分",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+PLATFORM_API_LATENCY = Histogram(
+    "platform_api_call_duration_seconds",
+    "社交平台API调用耗时",
+    ["platform", "operation", "outcome"]
+)
+PASSWORD_HASH_TASKS = Gauge(
+    "password_hash_tasks",
+    "密码哈希执行器中排队 (pending) 和执行中 (running) 的任务数",
+    ["state"],
+    multiprocess_mode="livesum"
+)
+PASSWORD_HASH_OPERATIONS = Gauge(
+    "password_hash_operations",
+    "进程启动以来完成 (completed) 和因排队过长被拒绝 (rejected) 的哈希任务数",
+    ["outcome"],
+    multiprocess_mode="livesum"
+)
+PASSWORD_HASH_AVG_SECONDS = Gauge(
+    "password_hash_avg_seconds",
+    "哈希任务的平均排队 (wait) 和计算 (run) 耗时",
+    ["phase"],
+    multiprocess_mode="liveall"
+)
+CACHE_LOOKUPS = Gauge(
+    "tiered_cache_lookups",
+    "进程启动以来两级缓存的查询次数，按命名空间、缓存级别 (local / redis) 和结果 (hit / miss)",
+    ["namespace", "level", "result"],
+    multiprocess_mode="livesum"
+)
+CACHE_HIT_RATIO = Gauge(
+    "tiered_cache_hit_ratio",
+    "两级缓存在任一级命中的比例",
+    ["namespace"],
+    multiprocess_mode="liveall"
+)
+CACHE_LOCAL_SIZE = Gauge(
+    "tiered_cache_local_entries",
+    "进程内缓存的条目数",
+    ["namespace"],
+    multiprocess_mode="livesum"
+)
+CACHE_LOCAL_EVICTIONS = Gauge(
+    "tiered_cache_local_evictions",
+    "进程启动以来进程内缓存因容量淘汰的条目数",
+    ["namespace"],
+    multiprocess_mode="livesum"
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+def _engine_label(engine, is_async: bool) -> str:
+    url = engine.url
+    label = f"{url.get_backend_name()}://{url.host}/{url.database}"
+    return f"{label} async" if is_async else label
+
+def _instrument_pool(engine, is_async: bool) -> None:
+    """连接借出和归还时记录本进程连接池的状态，空闲进程的值也始终是最新的
+
+    checkin 事件在连接真正放回连接池之前触发，此时读取 pool.checkedout() 会多算一个，
+    因此借出数按事件自行计数
+    """
+    target = engine.sync_engine if is_async else engine
+    size = getattr(target.pool, "size", None)
+    label = _engine_label(engine, is_async)
+    lock = threading.Lock()
+    checked_out = 0
+
+    def update(delta: int) -> None:
+        nonlocal checked_out
+        with lock:
+            checked_out = max(checked_out + delta, 0)
+            DB_POOL_CHECKED_OUT.labels(label).set(checked_out)
+            if size is not None:
+                DB_POOL_OVERFLOW.labels(label).set(max(checked_out - size(), 0))
+
+    event.listen(target, "checkout", lambda *args: update(1))
+    event.listen(target, "checkin", lambda *args: update(-1))
+    _pool_labels.add(label)
+    update(0)
+
+def _reset_pool_metrics() -> None:
+    """引擎被释放后不再保留旧连接池的值"""
+    for label in _pool_labels:
+        DB_POOL_CHECKED_OUT.labels(label).set(0)
+        DB_POOL_OVERFLOW.labels(label).set(0)
+
+_pool_labels: Set[str] = set()
+engine_registry.on_create(_instrument_pool)
+engine_registry.on_dispose(_reset_pool_metrics)
+
+def update_password_hash_metrics() -> None:
+    """记录本进程密码哈希执行器的当前状态"""
+    stats = password_hasher.stats()
+    PASSWORD_HASH_TASKS.labels("pending").set(stats["pending"])
+    PASSWORD_HASH_TASKS.labels("running").set(stats["running"])
+    PASSWORD_HASH_OPERATIONS.labels("completed").set(stats["completed"])
+    PASSWORD_HASH_OPERATIONS.labels("rejected").set(stats["rejected"])
+    PASSWORD_HASH_AVG_SECONDS.labels("wait").set(stats["avg_wait_ms"] / 1000)
+    PASSWORD_HASH_AVG_SECONDS.labels("run").set(stats["avg_run_ms"] / 1000)
+
+def update_cache_metrics() -> None:
+    """记录本进程各两级缓存命名空间的统计"""
+    for namespace, stats in TieredCache.all_stats().items():
+        local, redis = stats["local"], stats["redis"]
+        CACHE_LOOKUPS.labels(namespace, "local", "hit").set(local["hits"])
+        CACHE_LOOKUPS.labels(namespace, "local", "miss").set(local["misses"])
+        CACHE_LOOKUPS.labels(namespace, "redis", "hit").set(redis["hits"])
+        CACHE_LOOKUPS.labels(namespace, "redis", "miss").set(redis["misses"])
+        CACHE_HIT_RATIO.labels(namespace).set(stats["hit_ratio"])
+        CACHE_LOCAL_SIZE.labels(namespace).set(local["size"])
+        CACHE_LOCAL_EVICTIONS.labels(namespace).set(local["evictions"])
+
+def platform_call(platform: str, operation: str) -> Callable:
+    """记录平台API调用耗时的装饰器，抛出异常时 outcome 为 error"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                PLATFORM_API_LATENCY.labels(platform, operation, outcome).observe(
+                    time.perf_counter() - start
+                )
+        return wrapper
+    return decorator
+
+
+class CeleryQueueCollector:
+    """抓取时读取Celery队列长度 (Redis broker中每个队列是一个list)"""
+
+    def collect(self):
+        from app.tasks.celery_app import celery
+
+        gauge = GaugeMetricFamily("celery_queue_length", "Celery队列中等待执行的任务数", labels=["queue"])
+        queues = sorted({route["queue"] for route in celery.conf.task_routes.values()})
+        for queue in queues:
+            try:
+                gauge.add_metric([queue], sync_redis_client.llen(queue))
+            except Exception as e:
+                logger.warning(f"读取Celery队列长度失败 {queue}: {str(e)}")
+        yield gauge
+
+_queue_collector = CeleryQueueCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(_queue_collector)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """生成 /metrics 响应内容"""
+    update_password_hash_metrics()
+    update_cache_metrics()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead() -> None:
+    """进程退出时清理本进程的 live* 指标"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,360 @@
+"""
+中间件模块
+
+CompressionMiddleware：响应压缩
+1. 按 Accept-Encoding 协商 br / zstd / gzip (br、zstd 需安装对应库)
+2. 小于阈值的响应不压缩
+3. 流式响应边接收边压缩，累计到 COMPRESSION_FLUSH_SIZE 或距上次刷新超过
+   COMPRESSION_FLUSH_INTERVAL 时才刷新，兼顾压缩率和客户端收到数据的延迟
+4. 可压缩类型的响应 (包括未压缩的) 都带 Vary: Accept-Encoding，避免共享缓存返回错误的编码
+
+TimingMiddleware：请求耗时统计
+1. Server-Timing 响应头 (总耗时、MySQL/PostgreSQL/Redis 耗时、SQL条数)
+2. 每个请求一条日志，超过预算时记录警告
+
+MetricsMiddleware：按路由模板记录Prometheus请求耗时
+
+RateLimitHeadersMiddleware：把限流依赖的结果写入 RateLimit-* 响应头
+"""
+
+import time
+import zlib
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import observe_request
+from app.core.timing import RequestTimings, start_request
+from app.utils.logger import logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml", "application/javascript")
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+_COMPRESSORS = {"gzip": _GzipCompressor}
+if brotli is not None:
+    _COMPRESSORS["br"] = _BrotliCompressor
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = _ZstdCompressor
+
+
+def _parse_accept_encoding(value: str) -> Dict[str, float]:
+    weights = {}
+    for item in value.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """选择客户端接受且权重最高的编码，权重相同时按 encodings 顺序"""
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in encodings:
+        if name not in _COMPRESSORS:
+            continue
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """响应压缩中间件"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        encodings: List[str] = settings.COMPRESSION_ENCODINGS
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """在首个响应体到达时决定是否压缩，encoding 为None时只补充 Vary 响应头"""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: Optional[str],
+        minimum_size: int,
+        flush_size: int = settings.COMPRESSION_FLUSH_SIZE,
+        flush_interval: float = settings.COMPRESSION_FLUSH_INTERVAL
+    ):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+        self.unflushed = 0
+        self.flushed_at = 0.0
+
+    @staticmethod
+    def _compressible(start: Message, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if start["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(_COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+    def _compress_chunk(self, body: bytes) -> bytes:
+        """压缩流式响应的一块，累计足够的数据或超过刷新间隔时才刷新"""
+        data = self.compressor.compress(body) if body else b""
+        self.unflushed += len(body)
+        now = time.monotonic()
+        if self.unflushed and (
+            self.unflushed >= self.flush_size or now - self.flushed_at >= self.flush_interval
+        ):
+            data += self.compressor.flush()
+            self.unflushed = 0
+            self.flushed_at = now
+        return data
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 等待首个响应体，确定大小后再发送响应头
+            self.start_message = message
+            return
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            compressible = self._compressible(start, headers)
+            if compressible:
+                # 响应内容随 Accept-Encoding 变化，未压缩的响应也需要声明
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                not compressible
+                or self.encoding is None
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self.compressor = _COMPRESSORS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                # 流式响应长度未知，改用分块传输
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                self.flushed_at = time.monotonic()
+                # 首块立即刷新，客户端尽快收到数据
+                body = self.compressor.compress(body) + self.compressor.flush()
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if more_body:
+            body = self._compress_chunk(body)
+            if not body:
+                return
+        else:
+            body = (self.compressor.compress(body) if body else b"") + self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class TimingMiddleware:
+    """请求耗时统计中间件
+
+    响应头 Server-Timing 给出总耗时、各数据库与Redis耗时和SQL条数，
+    请求结束后记录一条日志，超过延迟或SQL条数预算时记录警告
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        latency_budget_ms: int = settings.REQUEST_LATENCY_BUDGET_MS,
+        query_budget: int = settings.REQUEST_QUERY_BUDGET,
+        emit_header: bool = settings.TIMING_HEADER_ENABLED
+    ):
+        self.app = app
+        self.latency_budget_ms = latency_budget_ms
+        self.query_budget = query_budget
+        self.emit_header = emit_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.emit_header:
+                    MutableHeaders(raw=message["headers"]).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self._log(scope, status_code, timings)
+
+    def _log(self, scope: Scope, status_code: int, timings: RequestTimings) -> None:
+        summary = timings.summary()
+        over_budget = []
+        if summary["total_ms"] > self.latency_budget_ms:
+            over_budget.append("latency")
+        if summary["queries"] > self.query_budget:
+            over_budget.append("queries")
+        fields = " ".join(f"{key}={value}" for key, value in summary.items())
+        line = f"request method={scope['method']} path={scope['path']} status={status_code} {fields}"
+        if over_budget:
+            logger.warning(f"{line} over_budget={','.join(over_budget)}")
+        else:
+            logger.info(line)
+
+
+class MetricsMiddleware:
+    """请求耗时指标中间件
+
+    路由标签使用路由模板 (如 /api/v1/teams/{team_id})，未匹配的请求统一记为 unmatched
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 路由匹配后FastAPI会把匹配到的路由写入scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            observe_request(scope["method"], route, status_code, time.perf_counter() - start)
+
+
+class RateLimitHeadersMiddleware:
+    """限流响应头中间件
+
+    限流依赖把响应头保存在 request.state 中，接口直接返回Response时也能带上
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                rate_limit_headers = scope.get("state", {}).get("rate_limit_headers")
+                if rate_limit_headers:
+                    headers = MutableHeaders(raw=message["headers"])
+                    for name, value in rate_limit_headers.items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,202 @@
+"""
+限流模块
+
+基于Redis令牌桶的限流：
+1. 令牌桶在Redis中由Lua脚本原子更新，使用Redis服务器时间，多个worker共享同一个桶
+2. 本地快速路径：桶内令牌充足时一次从Redis预支少量令牌，之后的请求在进程内扣减；
+   预支过期时未用完的令牌在下一次访问Redis时归还，不会让实际限额变严
+3. 按路由名和用户等级 (anonymous / default / superuser) 配置容量和补充速率
+4. 返回 RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset 响应头
+5. 未登录用户按客户端IP限流，经过可信代理 (TRUSTED_PROXIES) 时取 X-Forwarded-For 中的客户端IP
+"""
+
+import ipaddress
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from fastapi import Request
+from app.cache.redis import make_key, redis_client
+from app.core.config import settings
+from app.utils.logger import logger
+
+# KEYS[1]: 桶  ARGV: 容量, 每秒补充的令牌数, 本次消耗, 预支数量, 归还的令牌 (过期预支中未用完的)
+# 返回: {是否允许, 剩余令牌, 预支到的令牌}
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+local refund = tonumber(ARGV[5])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) / 1000 * rate + refund)
+
+local allowed = 0
+local leased = 0
+if tokens >= cost then
+    allowed = 1
+    tokens = tokens - cost
+    -- 预支后仍剩一半以上时才预支，接近上限的调用方每次都走Redis
+    if lease > 0 and tokens - lease >= capacity / 2 then
+        tokens = tokens - lease
+        leased = lease
+    end
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), leased}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # 令牌补满(或被拒绝时可以重试)的秒数
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.reset)
+        return headers
+
+
+class _Lease:
+    __slots__ = ("tokens", "remaining", "expires_at")
+
+    def __init__(self, tokens: int, remaining: float, expires_at: float):
+        self.tokens = tokens
+        self.remaining = remaining
+        self.expires_at = expires_at
+
+
+class RateLimiter:
+    """令牌桶限流器"""
+
+    key_prefix = "ratelimit:"
+
+    def __init__(
+        self,
+        limits: Dict[str, Dict[str, List[float]]] = settings.RATE_LIMITS,
+        lease_size: int = settings.RATE_LIMIT_LEASE_SIZE,
+        lease_ttl: float = settings.RATE_LIMIT_LEASE_TTL
+    ):
+        self.limits = limits
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self._leases: Dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._script = redis_client.register_script(_TOKEN_BUCKET)
+
+    def limit_for(self, name: str, tier: str) -> Optional[Tuple[int, float]]:
+        """路由在该等级下的 (容量, 每秒补充数)，未配置时返回None"""
+        route_limits = self.limits.get(name)
+        if not route_limits:
+            return None
+        limit = route_limits.get(tier) or route_limits.get("default")
+        if not limit:
+            return None
+        return int(limit[0]), float(limit[1])
+
+    def _take_local(self, key: str) -> Tuple[Optional[_Lease], int]:
+        """从本地预支中扣减一个令牌
+
+        返回 (预支, 需要归还的令牌数)；预支已过期时返回 (None, 未用完的令牌数)
+        """
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                return None, 0
+            if lease.tokens <= 0 or lease.expires_at < time.monotonic():
+                del self._leases[key]
+                return None, max(lease.tokens, 0)
+            lease.tokens -= 1
+            return lease, 0
+
+    def _store_lease(self, key: str, tokens: int, remaining: float) -> None:
+        with self._lock:
+            self._leases[key] = _Lease(tokens, remaining, time.monotonic() + self.lease_ttl)
+
+    async def hit(self, name: str, tier: str, identity: str) -> Optional[RateLimitResult]:
+        """消耗一个令牌，路由未配置限流时返回None"""
+        limit = self.limit_for(name, tier)
+        if limit is None:
+            return None
+        capacity, rate = limit
+        key = f"{self.key_prefix}{name}:{identity}"
+
+        lease, refund = self._take_local(key)
+        if lease is not None:
+            remaining = lease.remaining + lease.tokens
+            return RateLimitResult(True, capacity, int(remaining), math.ceil((capacity - remaining) / rate))
+
+        lease_size = min(self.lease_size, capacity // 4)
+        try:
+            allowed, tokens, leased = await self._script(
+                keys=[make_key(key)], args=[capacity, rate, 1, lease_size, refund]
+            )
+        except Exception as e:
+            # Redis不可用时不限流，避免影响正常请求
+            logger.warning(f"限流检查失败 {key}: {str(e)}")
+            return None
+
+        tokens = float(tokens)
+        leased = int(leased)
+        if leased:
+            self._store_lease(key, leased, tokens)
+        remaining = tokens + leased
+        if allowed:
+            return RateLimitResult(True, capacity, int(remaining), math.ceil((capacity - remaining) / rate))
+        return RateLimitResult(False, capacity, 0, math.ceil((1 - tokens) / rate))
+
+rate_limiter = RateLimiter()
+
+
+@lru_cache(maxsize=1)
+def _trusted_networks(proxies: Tuple[str, ...]) -> Tuple[Union[ipaddress.IPv4Network, ipaddress.IPv6Network], ...]:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+def _is_trusted(host: str) -> bool:
+    networks = _trusted_networks(tuple(settings.TRUSTED_PROXIES))
+    if not networks:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+def client_ip(request: Request) -> str:
+    """客户端IP
+
+    直连地址是可信代理时，从 X-Forwarded-For 右侧开始跳过可信代理，
+    取第一个不可信的地址；客户端自己伪造的左侧部分不会被采用
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted(host):
+        return host
+    forwarded = [
+        item.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for item in header.split(",")
+        if item.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted(address):
+            return address
+    return forwarded[0] if forwarded else host
@@ -0,0 +1,47 @@
+"""
+响应序列化模块
+
+1. 默认响应类使用 orjson 序列化
+2. 按 ResponseModel[T] 缓存预编译的 TypeAdapter
+3. model_response 直接生成JSON字节，跳过FastAPI对 response_model 的二次校验
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+from app.schemas.common import ResponseModel
+
+DefaultResponse = ORJSONResponse
+
+
+@lru_cache(maxsize=None)
+def response_adapter(data_type: Any) -> TypeAdapter:
+    """ResponseModel[data_type] 的校验/序列化器，每种类型只构建一次"""
+    return TypeAdapter(ResponseModel[data_type])
+
+
+class ModelResponse(Response):
+    """已经序列化为JSON字节的响应"""
+    media_type = "application/json"
+
+
+def model_response(
+    data_type: Any,
+    data: Any,
+    code: int = 200,
+    msg: str = "获取成功",
+    next_cursor: Optional[str] = None
+) -> ModelResponse:
+    """按 ResponseModel[data_type] 序列化数据并直接返回响应
+
+    参数:
+        data_type: 数据类型，与路由的 response_model 一致，如 List[schemas.Content]
+        data: ORM对象或其列表
+    """
+    adapter = response_adapter(data_type)
+    model = adapter.validate_python(
+        {"code": code, "msg": msg, "data": data, "next_cursor": next_cursor},
+        from_attributes=True
+    )
+    return ModelResponse(content=adapter.dump_json(model))
@@ -2,13 +2,23 @@
 安全相关工具模块
 """
 
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    # 成本不一致的哈希视为需要更新，登录时自动重新哈希
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS
+)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -26,6 +36,31 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_device_token(device_id: str, expires_delta: timedelta = None) -> str:
+    """
+    创建设备令牌，只能用于设备连接 (/devices/ws)，不能作为用户令牌使用
+    """
+    expire = datetime.utcnow() + (
+        expires_delta or timedelta(minutes=settings.DEVICE_TOKEN_EXPIRE_MINUTES)
+    )
+    to_encode = {"exp": expire, "sub": f"device:{device_id}", "typ": "device"}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def decode_device_token(token: Optional[str]) -> Optional[str]:
+    """
+    解析设备令牌中的设备id，无效或不是设备令牌时返回None
+    """
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.JWTError:
+        return None
+    subject = payload.get("sub") or ""
+    if payload.get("typ") != "device" or not subject.startswith("device:"):
+        return None
+    return subject[len("device:"):]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码
@@ -36,4 +71,105 @@ def get_password_hash(password: str) -> str:
     """
     获取密码哈希值
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，成本参数变化时同时返回新哈希
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """等待中的哈希任务超过上限"""
+
+
+class PasswordHasher:
+    """密码哈希执行器
+
+    bcrypt 每次调用需要 100~250ms CPU，放在事件循环里会阻塞所有请求。
+    这里把计算交给有界的线程池/进程池，并限制并发和排队长度。
+    """
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+        return self._semaphore
+
+    async def _run(self, func, *args):
+        if self.pending >= settings.PASSWORD_HASH_MAX_QUEUE:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many pending password hash operations")
+
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self.pending += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.pending -= 1
+
+        self.running += 1
+        started_at = time.perf_counter()
+        self.total_wait += started_at - queued_at
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.total_run += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """异步生成密码哈希"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """异步验证密码"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """异步验证密码，需要时返回按当前成本重新生成的哈希"""
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度和耗时统计"""
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "pending": self.pending,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait * 1000 / self.completed if self.completed else 0.0,
+            "avg_run_ms": self.total_run * 1000 / self.completed if self.completed else 0.0
+        }
+
+password_hasher = PasswordHasher()
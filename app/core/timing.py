@@ -0,0 +1,89 @@
+"""
+请求耗时统计模块
+
+在一次请求内累计各类外部调用的耗时：
+1. MySQL / PostgreSQL：通过引擎的 before/after_cursor_execute 事件计时
+2. Redis：通过 TimedRedis 包装的命令计时
+3. 统计对象保存在 ContextVar 中，请求之外的调用 (Celery、启动过程) 不做统计
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+class RequestTimings:
+    """一次请求的耗时统计 (秒)"""
+
+    __slots__ = ("start", "sql", "queries", "redis", "redis_calls")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql: Dict[str, float] = {}  # 按数据库类型 (mysql / postgresql) 统计
+        self.queries = 0
+        self.redis = 0.0
+        self.redis_calls = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 响应头"""
+        parts = [f"app;dur={self.elapsed * 1000:.1f}"]
+        for name, seconds in self.sql.items():
+            parts.append(f"{name};dur={seconds * 1000:.1f}")
+        parts.append(f'db;desc="{self.queries} queries"')
+        if self.redis_calls:
+            parts.append(f'redis;dur={self.redis * 1000:.1f};desc="{self.redis_calls} calls"')
+        return ", ".join(parts)
+
+    def summary(self) -> Dict[str, Any]:
+        data = {"total_ms": round(self.elapsed * 1000, 1), "queries": self.queries}
+        for name, seconds in self.sql.items():
+            data[f"{name}_ms"] = round(seconds * 1000, 1)
+        data["redis_ms"] = round(self.redis * 1000, 1)
+        data["redis_calls"] = self.redis_calls
+        return data
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+def record_redis(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.redis += seconds
+        timings.redis_calls += 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info["query_start"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    timings = _current.get()
+    if timings is None:
+        return
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    name = conn.engine.dialect.name
+    timings.sql[name] = timings.sql.get(name, 0.0) + elapsed
+    timings.queries += 1
+
+def instrument_engine(engine: Any) -> None:
+    """为引擎注册SQL计时事件"""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,4 +1,10 @@
-from app.db.session import SessionLocal, engine
+from app.db.session import SessionLocal, engine_registry
 from app.db.base_class import Base
 
-__all__ = ["Base", "engine", "SessionLocal"] 
\ No newline at end of file
+__all__ = ["Base", "engine", "engine_registry", "SessionLocal"]
+
+def __getattr__(name: str):
+    # 引擎延迟创建，导入 app.db 时不会连接数据库
+    if name == "engine":
+        return engine_registry.mysql()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,119 @@
+"""
+读写分离模块
+
+把只读请求路由到MySQL只读副本：
+1. 副本选择：轮询或最少连接
+2. 读己之写：用户写入后的短时间内读请求仍走主库
+3. 未配置副本时退回主库
+"""
+
+import itertools
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.cache.local import TTLCache
+from app.cache.redis import RedisCache
+from app.core.config import settings
+from app.db.session import engine_registry
+from app.utils.logger import logger
+
+class ReplicaRouter:
+    """只读副本选择器"""
+
+    def __init__(self, strategy: str = settings.DB_REPLICA_STRATEGY):
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._factories: Dict[Any, sessionmaker] = {}
+        # 引擎被释放 (如 configure 切换角色) 后不再持有旧引擎的会话工厂
+        engine_registry.on_dispose(self._factories.clear)
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了只读副本"""
+        return bool(settings.MYSQL_REPLICA_HOSTS)
+
+    @staticmethod
+    def _checked_out(engine: Any) -> int:
+        if isinstance(engine, AsyncEngine):
+            engine = engine.sync_engine
+        checkedout = getattr(engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def choose(self, engines: List[Any]) -> Optional[Any]:
+        """按策略选择一个副本，没有副本时返回None"""
+        if not engines:
+            return None
+        if self.strategy == "least_connections":
+            return min(engines, key=self._checked_out)
+        return engines[next(self._counter) % len(engines)]
+
+    def _factory(self, engine: Any, **kwargs) -> sessionmaker:
+        factory = self._factories.get(engine)
+        if factory is None:
+            factory = sessionmaker(bind=engine, autoflush=False, **kwargs)
+            self._factories[engine] = factory
+        return factory
+
+    def session(self, use_primary: bool = False) -> Session:
+        """创建只读会话"""
+        engine = None if use_primary else self.choose(engine_registry.mysql_replicas())
+        return self._factory(engine or engine_registry.mysql())()
+
+    def async_session(self, use_primary: bool = False) -> AsyncSession:
+        """创建异步只读会话"""
+        engine = None if use_primary else self.choose(engine_registry.async_mysql_replicas())
+        return self._factory(
+            engine or engine_registry.async_mysql(),
+            class_=AsyncSession,
+            expire_on_commit=False
+        )()
+
+replica_router = ReplicaRouter()
+
+
+class ReadYourWrites:
+    """读己之写标记
+
+    先查进程内缓存，再查Redis，保证同一用户的请求落到其他worker时也能读到自己的写入
+    """
+
+    key_prefix = "rw:"
+
+    def __init__(self, window: int = settings.DB_READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self.local = TTLCache(maxsize=100000, ttl=window)
+        self.redis = RedisCache()
+
+    async def mark(self, user_id: Any) -> None:
+        """记录用户刚刚写入"""
+        if not self.window:
+            return
+        key = f"{self.key_prefix}{user_id}"
+        self.local.set(key, True)
+        try:
+            await self.redis.set(key, "1", expire=self.window)
+        except Exception as e:
+            logger.warning(f"写入读写分离标记失败: {str(e)}")
+
+    async def is_sticky(self, user_id: Any) -> bool:
+        """用户是否需要读主库"""
+        if not self.window or user_id is None:
+            return False
+        key = f"{self.key_prefix}{user_id}"
+        if self.local.get(key):
+            return True
+        try:
+            return await self.redis.get(key) is not None
+        except Exception as e:
+            logger.warning(f"读取读写分离标记失败: {str(e)}")
+            # Redis不可用时保守地读主库
+            return True
+
+read_your_writes = ReadYourWrites()
+
+
+@event.listens_for(Session, "after_flush")
+def _record_write(session: Session, flush_context) -> None:
+    """会话有数据写入时打标记，请求结束后据此设置读己之写窗口"""
+    session.info["has_writes"] = True
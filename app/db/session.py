@@ -2,50 +2,200 @@
 数据库会话模块
 
 管理MySQL和PostgreSQL的数据库连接和会话
+
+引擎统一由 EngineRegistry 管理：
+1. 首次使用时才创建，不访问分析库的进程不会连接PostgreSQL
+2. 相同URI只创建一个连接池
+3. 连接池大小按进程角色 (api / worker / scheduler) 从配置读取
 """
 
+import threading
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Tuple
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from app.core.config import settings
-from typing import Generator
+from app.core.timing import instrument_engine
+from app.utils.logger import logger
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.MYSQL_DATABASE_URI,
-    pool_pre_ping=True,
-    echo=settings.LOG_LEVEL == "DEBUG"
-)
+class EngineRegistry:
+    """数据库引擎注册表"""
+
+    def __init__(self, role: str = settings.DB_ROLE):
+        self.role = role
+        self._engines: Dict[Tuple[str, bool], Any] = {}
+        self._lock = threading.Lock()
+        self._dispose_listeners: List[Callable[[], None]] = []
+        self._create_listeners: List[Callable[[Any, bool], None]] = []
+
+    def on_create(self, listener: Callable[[Any, bool], None]) -> None:
+        """注册引擎创建时的回调 (引擎, 是否异步)，已创建的引擎立即回调一次"""
+        self._create_listeners.append(listener)
+        for (_, is_async), engine in self.engines().items():
+            listener(engine, is_async)
+
+    def on_dispose(self, listener: Callable[[], None]) -> None:
+        """注册引擎被释放时的回调，用于清除按引擎缓存的会话工厂等"""
+        self._dispose_listeners.append(listener)
+
+    def configure(self, role: str) -> None:
+        """设置进程角色
+
+        已创建的引擎会被释放，之后按新角色的连接池配置重新创建
+        """
+        if role == self.role:
+            return
+        self.role = role
+        self.dispose()
+
+    def pool_options(self) -> Dict[str, Any]:
+        """当前角色的连接池参数"""
+        return dict(settings.DB_POOL_CONFIG.get(self.role, {}))
+
+    def get_engine(self, uri: str, is_async: bool = False):
+        """获取引擎，不存在时创建"""
+        key = (uri, is_async)
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                factory = create_async_engine if is_async else create_engine
+                engine = factory(
+                    uri,
+                    pool_pre_ping=True,
+                    echo=settings.LOG_LEVEL == "DEBUG",
+                    **self.pool_options()
+                )
+                instrument_engine(engine)
+                for listener in self._create_listeners:
+                    listener(engine, is_async)
+                self._engines[key] = engine
+                logger.info(
+                    f"创建数据库引擎: {engine.url.render_as_string(hide_password=True)} "
+                    f"(role={self.role}, async={is_async})"
+                )
+        return engine
+
+    def mysql(self) -> Engine:
+        return self.get_engine(settings.MYSQL_DATABASE_URI)
+
+    def postgres(self) -> Engine:
+        return self.get_engine(settings.POSTGRES_DATABASE_URI)
+
+    def async_mysql(self) -> AsyncEngine:
+        return self.get_engine(settings.MYSQL_ASYNC_DATABASE_URI, is_async=True)
+
+    def async_postgres(self) -> AsyncEngine:
+        return self.get_engine(settings.POSTGRES_ASYNC_DATABASE_URI, is_async=True)
+
+    def mysql_replicas(self) -> List[Engine]:
+        return [self.get_engine(uri) for uri in settings.MYSQL_REPLICA_URIS]
+
+    def async_mysql_replicas(self) -> List[AsyncEngine]:
+        return [
+            self.get_engine(uri, is_async=True)
+            for uri in settings.MYSQL_ASYNC_REPLICA_URIS
+        ]
+
+    def engines(self) -> Dict[Tuple[str, bool], Any]:
+        """已创建的引擎"""
+        return dict(self._engines)
+
+    def _take_all(self) -> Dict[Tuple[str, bool], Any]:
+        with self._lock:
+            engines, self._engines = self._engines, {}
+        for listener in self._dispose_listeners:
+            listener()
+        return engines
+
+    def dispose(self) -> None:
+        """释放所有连接池
+
+        异步引擎的连接属于创建它的事件循环，这里只丢弃引用；
+        在事件循环中应使用 dispose_async()
+        """
+        for engine in self._take_all().values():
+            if not isinstance(engine, AsyncEngine):
+                engine.dispose()
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async def dispose_async(self) -> None:
+        """释放所有连接池，异步引擎的连接在当前事件循环中关闭"""
+        for engine in self._take_all().values():
+            if isinstance(engine, AsyncEngine):
+                await engine.dispose()
+            else:
+                engine.dispose()
 
-# MySQL引擎和会话
-mysql_engine = create_engine(
-    settings.MYSQL_DATABASE_URI,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10
+engine_registry = EngineRegistry()
+
+
+class LazySessionMaker:
+    """延迟绑定引擎的会话工厂
+
+    与 sessionmaker 用法一致，第一次创建会话时才从注册表获取引擎
+    """
+
+    def __init__(self, engine_getter: Callable[[], Any], **kwargs):
+        self._engine_getter = engine_getter
+        self._kwargs = kwargs
+        self._factory: Optional[sessionmaker] = None
+        self._bind = None
+
+    def __call__(self, **kwargs):
+        engine = self._engine_getter()
+        if self._factory is None or self._bind is not engine:
+            self._factory = sessionmaker(bind=engine, **self._kwargs)
+            self._bind = engine
+        return self._factory(**kwargs)
+
+
+# MySQL会话
+MySQLSessionLocal = LazySessionMaker(
+    engine_registry.mysql,
+    autocommit=False,
+    autoflush=False
 )
-MySQLSessionLocal = sessionmaker(
+SessionLocal = MySQLSessionLocal
+
+# PostgreSQL会话
+PostgresSessionLocal = LazySessionMaker(
+    engine_registry.postgres,
     autocommit=False,
-    autoflush=False,
-    bind=mysql_engine
+    autoflush=False
 )
 
-# PostgreSQL引擎和会话
-postgres_engine = create_engine(
-    settings.POSTGRES_DATABASE_URI,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10
+# 异步会话 (供 async def 接口使用，查询不会阻塞事件循环)
+AsyncMySQLSessionLocal = LazySessionMaker(
+    engine_registry.async_mysql,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
 )
-PostgresSessionLocal = sessionmaker(
-    autocommit=False,
+AsyncPostgresSessionLocal = LazySessionMaker(
+    engine_registry.async_postgres,
+    class_=AsyncSession,
     autoflush=False,
-    bind=postgres_engine
+    expire_on_commit=False
 )
 
+_LAZY_ENGINES = {
+    "engine": engine_registry.mysql,
+    "mysql_engine": engine_registry.mysql,
+    "postgres_engine": engine_registry.postgres,
+    "async_mysql_engine": engine_registry.async_mysql,
+    "async_postgres_engine": engine_registry.async_postgres,
+}
+
+def __getattr__(name: str):
+    """兼容旧的模块级引擎变量，访问时才创建引擎"""
+    if name in _LAZY_ENGINES:
+        return _LAZY_ENGINES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # 基础模型类
 MySQLBase = declarative_base()
 PostgresBase = declarative_base()
@@ -65,4 +215,14 @@ def get_postgres_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_mysql_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取MySQL异步数据库会话"""
+    async with AsyncMySQLSessionLocal() as db:
+        yield db
+
+async def get_async_postgres_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取PostgreSQL异步数据库会话"""
+    async with AsyncPostgresSessionLocal() as db:
+        yield db
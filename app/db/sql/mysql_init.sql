@@ -1,8 +1,11 @@
 -- MySQL基础数据库初始化脚本
+-- 与 alembic 最新版本的表结构一致，用本脚本建库后执行 `alembic stamp head`
 CREATE DATABASE IF NOT EXISTS socialdb DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
 USE socialdb;
 
 -- 删除已存在的表（如果需要重新创建）
+DROP TABLE IF EXISTS tasks;
+DROP TABLE IF EXISTS device_config_versions;
 DROP TABLE IF EXISTS team_members;
 DROP TABLE IF EXISTS contents;
 DROP TABLE IF EXISTS devices;
@@ -28,9 +31,12 @@ CREATE TABLE teams (
     name VARCHAR(191) NOT NULL COMMENT '团队名称',
     description TEXT COMMENT '团队描述',
     owner_id INT NOT NULL COMMENT '团队所有者ID',
+    is_active BOOLEAN DEFAULT TRUE COMMENT '是否激活',
+    config JSON COMMENT '团队配置JSON',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-    FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
+    FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_teams_owner_id (owner_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='团队信息表';
 
 -- 团队成员表
@@ -66,7 +72,8 @@ CREATE TABLE accounts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_platform_user (user_id, platform, platform_id(50))
+    UNIQUE KEY unique_platform_user (user_id, platform, platform_id(50)),
+    INDEX ix_accounts_user_id_platform (user_id, platform)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='社交平台账号表';
 
 -- 内容表
@@ -76,33 +83,70 @@ CREATE TABLE contents (
     account_id INT NOT NULL COMMENT '发布账号ID',
     title VARCHAR(191) NOT NULL COMMENT '内容标题',
     content TEXT NOT NULL COMMENT '内容正文',
+    content_type VARCHAR(50) COMMENT '内容类型：text,image,video',
+    platform VARCHAR(50) COMMENT '发布平台',
     media_urls JSON COMMENT '媒体文件URL列表',
     platforms JSON COMMENT '发布平台列表',
-    schedule_time TIMESTAMP NULL COMMENT '计划发布时间',
+    scheduled_time TIMESTAMP NULL COMMENT '计划发布时间',
+    published_at TIMESTAMP NULL COMMENT '实际发布时间',
     status VARCHAR(50) DEFAULT 'draft' COMMENT '状态：draft-草稿,scheduled-计划发布,published-已发布,failed-发布失败',
     tags JSON COMMENT '标签列表',
     config JSON COMMENT '发布配置JSON',
+    meta_data JSON COMMENT '内容元数据JSON',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+    FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE,
+    INDEX ix_contents_account_id_created_at (account_id, created_at),
+    INDEX ix_contents_user_id_id (user_id, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='内容发布表';
 
 -- 设备表
 CREATE TABLE devices (
     id INT PRIMARY KEY AUTO_INCREMENT COMMENT '设备ID',
     user_id INT NOT NULL COMMENT '所属用户ID',
-    device_name VARCHAR(191) NOT NULL COMMENT '设备名称',
+    name VARCHAR(191) NOT NULL COMMENT '设备名称',
     device_type VARCHAR(50) NOT NULL COMMENT '设备类型：desktop-桌面端,mobile-移动端,tablet-平板',
     device_id VARCHAR(191) UNIQUE NOT NULL COMMENT '设备唯一标识',
     status VARCHAR(50) DEFAULT 'offline' COMMENT '状态：online-在线,offline-离线,disabled-禁用',
-    last_heartbeat TIMESTAMP NULL COMMENT '最后心跳时间',
+    last_seen TIMESTAMP NULL COMMENT '最后心跳时间',
+    is_active BOOLEAN DEFAULT TRUE COMMENT '是否启用',
     config JSON COMMENT '设备配置JSON',
+    config_version INT NOT NULL DEFAULT 0 COMMENT '配置版本号，每次修改配置加1',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_devices_user_id (user_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='设备管理表';
 
+-- 设备配置历史表
+CREATE TABLE device_config_versions (
+    device_id INT NOT NULL COMMENT '设备ID (devices.id)',
+    version INT NOT NULL COMMENT '配置版本号',
+    config JSON COMMENT '该版本的完整配置',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    PRIMARY KEY (device_id, version),
+    FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='设备配置历史表，用于生成增量配置';
+
+-- 任务表
+CREATE TABLE tasks (
+    id INT PRIMARY KEY AUTO_INCREMENT COMMENT '任务ID',
+    name VARCHAR(191) COMMENT '任务名称',
+    type VARCHAR(50) COMMENT '任务类型：autoLike,autoFollow等',
+    platform VARCHAR(50) COMMENT '平台：tiktok,instagram等',
+    status VARCHAR(50) DEFAULT 'pending' COMMENT '状态：pending,running,completed,failed',
+    config JSON COMMENT '任务配置JSON',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '更新时间',
+    account_id INT COMMENT '执行账号ID',
+    user_id INT COMMENT '所属用户ID',
+    FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_tasks_name (name),
+    INDEX ix_tasks_user_id (user_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='任务表';
+
 -- 插入测试数据
 INSERT INTO users (email, hashed_password, full_name, is_superuser) 
 VALUES ('admin@example.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewKyNiAYqeScNazC', 'Admin User', TRUE);
@@ -120,5 +164,5 @@ INSERT INTO contents (user_id, account_id, title, content, platforms, status)
 VALUES (1, 1, '测试内容', '这是一条测试内容', '["facebook"]', 'draft');
 
 -- 插入测试设备
-INSERT INTO devices (user_id, device_name, device_type, device_id)
+INSERT INTO devices (user_id, name, device_type, device_id)
 VALUES (1, '测试设备', 'desktop', 'dev123');
\ No newline at end of file
@@ -0,0 +1,38 @@
+-- 设备指标时序表 (PostgreSQL 分析库)
+-- 与 app/models/analytics_models.py 中的 DeviceMetric / DeviceMetricMinute / DeviceMetricHour 一致
+
+-- 原始指标，保留 DEVICE_METRICS_RAW_RETENTION_DAYS 天
+CREATE TABLE IF NOT EXISTS device_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    device_id VARCHAR(191) NOT NULL,  -- 关联到MySQL的devices.device_id
+    name VARCHAR(64) NOT NULL,  -- 指标名，嵌套字段以 . 连接，如 network.rtt
+    value DOUBLE PRECISION NOT NULL,
+    ts TIMESTAMPTZ NOT NULL  -- 服务端接收时间
+);
+CREATE INDEX IF NOT EXISTS ix_device_metrics_device_name_ts ON device_metrics (device_id, name, ts);
+-- 按时间追加写入，BRIN索引体积很小，用于聚合和清理时的时间范围扫描
+CREATE INDEX IF NOT EXISTS ix_device_metrics_ts ON device_metrics USING BRIN (ts);
+
+-- 1分钟聚合，保留 DEVICE_METRICS_MINUTE_RETENTION_DAYS 天
+CREATE TABLE IF NOT EXISTS device_metrics_1m (
+    device_id VARCHAR(191) NOT NULL,
+    name VARCHAR(64) NOT NULL,
+    bucket TIMESTAMPTZ NOT NULL,
+    count INTEGER NOT NULL,
+    sum DOUBLE PRECISION NOT NULL,
+    min DOUBLE PRECISION NOT NULL,
+    max DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (device_id, name, bucket)
+);
+
+-- 1小时聚合，长期保留
+CREATE TABLE IF NOT EXISTS device_metrics_1h (
+    device_id VARCHAR(191) NOT NULL,
+    name VARCHAR(64) NOT NULL,
+    bucket TIMESTAMPTZ NOT NULL,
+    count INTEGER NOT NULL,
+    sum DOUBLE PRECISION NOT NULL,
+    min DOUBLE PRECISION NOT NULL,
+    max DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (device_id, name, bucket)
+);
@@ -2,18 +2,31 @@
 应用程序入口模块
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.responses import DefaultResponse
+from app.core.middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    RateLimitHeadersMiddleware,
+    TimingMiddleware,
+)
+from app.core.metrics import mark_process_dead, render_metrics
 from app.api.v1 import api_router
 from app.core.logger import setup_logger
+from app.cache.tiered import invalidation_listener
+from app.services.device_channel import device_channel
+from app.services.device_metrics_service import device_metrics_buffer
+from app.db.session import engine_registry
 
 # 设置日志
 logger = setup_logger()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=DefaultResponse
 )
 
 # 设置CORS
@@ -33,13 +46,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 限流响应头
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitHeadersMiddleware)
+
+# 响应压缩
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Prometheus 请求指标
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 请求耗时统计 (最外层，包含压缩耗时)
+if settings.TIMING_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
 # 注册路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def startup():
+    # 订阅缓存失效广播，保持各worker的本地缓存一致
+    invalidation_listener.start()
+    # 订阅设备命令，推送给连接在本worker上的设备
+    device_channel.start()
+    # 心跳指标定时批量写入PostgreSQL
+    device_metrics_buffer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await invalidation_listener.stop()
+    await device_channel.stop()
+    await device_metrics_buffer.stop()
+    # 最后释放连接池，异步引擎需要在事件循环中关闭连接
+    await engine_registry.dispose_async()
+    mark_process_dead()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Social Media Manager API"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus 指标 (同步函数，在线程池中读取Celery队列长度)"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
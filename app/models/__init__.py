@@ -3,8 +3,16 @@ from app.models.user import User
 from app.models.account import Account
 from app.models.content import Content
 from app.models.team import Team
-from app.models.device import Device
+from app.models.device import Device, DeviceConfigVersion
 from app.models.task import Task
+from app.models.analytics_models import (
+    ContentAnalytics,
+    AccountAnalytics,
+    EngagementMetrics,
+    DeviceMetric,
+    DeviceMetricMinute,
+    DeviceMetricHour
+)
 
 __all__ = [
     "Base",
@@ -13,5 +21,12 @@ __all__ = [
     "Content",
     "Team",
     "Device",
-    "Task"
+    "DeviceConfigVersion",
+    "Task",
+    "ContentAnalytics",
+    "AccountAnalytics",
+    "EngagementMetrics",
+    "DeviceMetric",
+    "DeviceMetricMinute",
+    "DeviceMetricHour"
 ] 
\ No newline at end of file
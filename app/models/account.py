@@ -2,7 +2,7 @@
 社交账号模型模块
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -17,10 +17,17 @@ class Account(Base):
     platform = Column(String(50), nullable=False)  # 平台类型：instagram, tiktok 等
     platform_id = Column(String(255))  # 平台账号ID
     username = Column(String(255))
+    profile_url = Column(String(191))
+    description = Column(Text)
+    avatar_url = Column(String(191))
     access_token = Column(String(1024))
     refresh_token = Column(String(1024))
     token_expires_at = Column(DateTime)
     is_active = Column(Boolean, default=True)
+    followers_count = Column(Integer, default=0)
+    following_count = Column(Integer, default=0)
+    total_posts = Column(Integer, default=0)
+    config = Column(JSON)
     
     # 审计字段，用于记录账号信息的创建和更新时间
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -31,6 +38,11 @@ class Account(Base):
     contents = relationship("Content", back_populates="account")
     tasks = relationship("Task", back_populates="account")
 
+    __table_args__ = (
+        # 账号列表按 user_id (+ platform) 过滤
+        Index("ix_accounts_user_id_platform", "user_id", "platform"),
+    )
+
     def __repr__(self):
         """返回社交媒体账号的字符串表示形式"""
         return f"<Account {self.platform}:{self.username}>"
\ No newline at end of file
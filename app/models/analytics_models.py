@@ -2,7 +2,7 @@
 分析数据模型 (PostgreSQL)
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String, DateTime, JSON, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB
 from app.db.session import PostgresBase
 
@@ -34,4 +34,43 @@ class EngagementMetrics(PostgresBase):
     platform = Column(String)
     engagement_type = Column(String)  # like, comment, share
     count = Column(Integer)
-    date = Column(DateTime) 
\ No newline at end of file
+    date = Column(DateTime) 
+
+class DeviceMetric(PostgresBase):
+    """设备心跳上报的原始指标，每个数值指标一行"""
+    __tablename__ = "device_metrics"
+
+    id = Column(BigInteger, primary_key=True)
+    device_id = Column(String(191), nullable=False)  # 关联到MySQL的devices.device_id
+    name = Column(String(64), nullable=False)  # cpu, battery, queue_length ...
+    value = Column(Float, nullable=False)
+    ts = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_device_metrics_device_name_ts", "device_id", "name", "ts"),
+        Index("ix_device_metrics_ts", "ts", postgresql_using="brin"),
+    )
+
+class DeviceMetricMinute(PostgresBase):
+    """设备指标的1分钟聚合"""
+    __tablename__ = "device_metrics_1m"
+
+    device_id = Column(String(191), primary_key=True)
+    name = Column(String(64), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+
+class DeviceMetricHour(PostgresBase):
+    """设备指标的1小时聚合"""
+    __tablename__ = "device_metrics_1h"
+
+    device_id = Column(String(191), primary_key=True)
+    name = Column(String(64), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
@@ -2,7 +2,7 @@
 内容模型模块
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -22,6 +22,10 @@ class Content(Base):
     scheduled_time = Column(DateTime(timezone=True))
     published_at = Column(DateTime(timezone=True))
     meta_data = Column(JSON)
+    media_urls = Column(JSON)
+    platforms = Column(JSON)
+    tags = Column(JSON)
+    config = Column(JSON)
 
     # 审计字段
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -31,5 +35,12 @@ class Content(Base):
     user = relationship("User", back_populates="contents")
     account = relationship("Account", back_populates="contents")
 
+    __table_args__ = (
+        # 账号分析按 account_id + created_at 范围查询
+        Index("ix_contents_account_id_created_at", "account_id", "created_at"),
+        # 用户内容列表按 user_id 过滤、按 id 游标分页
+        Index("ix_contents_user_id_id", "user_id", "id"),
+    )
+
     def __repr__(self):
         return f"<Content {self.title}>" 
\ No newline at end of file
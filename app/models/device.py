@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 from app.db.base_class import Base
 
@@ -7,11 +8,29 @@ class Device(Base):
     __tablename__ = "devices"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String)
-    device_id = Column(String, unique=True, index=True)
-    status = Column(String, default="offline")  # online, offline, busy
+    name = Column(String(191))
+    device_type = Column(String(50))  # desktop, mobile, tablet
+    device_id = Column(String(191), unique=True, index=True)
+    status = Column(String(50), default="offline")  # online, offline, busy
     last_seen = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
-    
+    config = Column(JSON)
+    config_version = Column(Integer, nullable=False, default=0, server_default="0")  # 每次修改配置加1
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
     user_id = Column(Integer, ForeignKey("users.id"))
-    user = relationship("User", back_populates="devices") 
\ No newline at end of file
+    user = relationship("User", back_populates="devices")
+
+    __table_args__ = (
+        Index("ix_devices_user_id", "user_id"),
+    )
+
+class DeviceConfigVersion(Base):
+    """设备配置历史，保留最近 DEVICE_CONFIG_HISTORY 个版本，用于生成增量配置"""
+    __tablename__ = "device_config_versions"
+
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    config = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
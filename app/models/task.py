@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
@@ -19,4 +19,8 @@ class Task(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     
     account = relationship("Account", back_populates="tasks")
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_tasks_user_id", "user_id"),
+    )
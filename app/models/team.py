@@ -13,7 +13,7 @@
 - 团队资源隔离
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -37,6 +37,10 @@ class Team(Base):
     owner = relationship("User", back_populates="teams")
     members = relationship("TeamMember", back_populates="team")
 
+    __table_args__ = (
+        Index("ix_teams_owner_id", "owner_id"),
+    )
+
     def __repr__(self):
         return f"<Team {self.name}>"
 
@@ -12,6 +12,10 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
+from app.core.metrics import platform_call
+
+# 这些接口会记录调用耗时指标
+_INSTRUMENTED_METHODS = ("post_content", "get_analytics", "schedule_post")
 
 class BasePlatform(ABC):
     """社交平台基类
@@ -23,6 +27,14 @@ class BasePlatform(ABC):
     
     所有具体的平台实现都必须继承此类并实现这些方法
     """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        platform = cls.__name__.replace("Platform", "").lower()
+        for name in _INSTRUMENTED_METHODS:
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, platform_call(platform, name)(method))
     
     @abstractmethod
     async def post_content(self, content: Dict[str, Any]) -> Dict[str, Any]:
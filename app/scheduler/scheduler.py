@@ -18,6 +18,7 @@ from typing import Dict, Any
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from app.core.config import settings
+from app.db.session import engine_registry
 
 class TaskScheduler:
     """任务调度器
@@ -36,8 +37,10 @@ class TaskScheduler:
         - 设置执行器
         - 初始化调度器
         """
+        # 调度进程使用scheduler角色的连接池，任务存储复用同一个MySQL引擎
+        engine_registry.configure("scheduler")
         jobstores = {
-            'default': SQLAlchemyJobStore(url=settings.SQLALCHEMY_DATABASE_URI)
+            'default': SQLAlchemyJobStore(engine=engine_registry.mysql())
         }
         self.scheduler = AsyncIOScheduler(jobstores=jobstores)
         
@@ -1,5 +1,5 @@
 # 导入用户相关的schemas
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.user import User, UserCreate, UserUpdate, UserPrincipal
 # 导入认证Token相关的schemas
 from app.schemas.token import Token, TokenPayload
 # 导入账户相关的schemas
@@ -16,7 +16,11 @@ from app.schemas.device import (
     DeviceUpdate,
     DeviceRegister,
     DeviceConfigUpdate,
-    DeviceHeartbeat
+    DeviceHeartbeat,
+    DeviceCommand,
+    DeviceToken,
+    DeviceMetricPoint,
+    DeviceMetricSeries
 )
 # 导入内容相关的schemas
 from app.schemas.content import Content, ContentCreate, ContentUpdate
@@ -28,19 +32,23 @@ from app.schemas.analytics import (
     PerformanceReport,
     AnalyticsSummary
 )
+# 导入批量请求相关的schemas
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponseItem
 
 # 定义 __all__ 列表，指定模块中公开的类和模型
 __all__ = [
-    "User", "UserCreate", "UserUpdate",
+    "User", "UserCreate", "UserUpdate", "UserPrincipal",
     "Token", "TokenPayload",
     "Account", "AccountCreate", "AccountUpdate",
     "Team", "TeamCreate", "TeamUpdate", "TeamMember", "TeamMemberCreate",
     "Post", "PostCreate", "PostUpdate",
     "Device", "DeviceCreate", "DeviceUpdate", "DeviceRegister", "DeviceConfigUpdate", "DeviceHeartbeat",
+    "DeviceCommand", "DeviceToken", "DeviceMetricPoint", "DeviceMetricSeries",
     "Content", "ContentCreate", "ContentUpdate",
     "ContentAnalytics",
     "AccountAnalytics",
     "TrendsAnalysis",
     "PerformanceReport",
-    "AnalyticsSummary"
+    "AnalyticsSummary",
+    "BatchRequest", "BatchRequestItem", "BatchResponseItem"
 ]
@@ -34,7 +34,7 @@ class AccountInDBBase(AccountBase):
     id: int
     user_id: int
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # 未更新过的记录为空
     followers_count: Optional[int] = 0
     following_count: Optional[int] = 0
     total_posts: Optional[int] = 0
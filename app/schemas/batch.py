@@ -0,0 +1,23 @@
+"""
+批量请求相关的Pydantic模型
+"""
+
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class BatchRequestItem(BaseModel):
+    """单个子请求"""
+    id: Optional[str] = None  # 客户端自定义标识，原样返回
+    method: str = "GET"
+    path: str  # 相对于API前缀的路径，可带查询参数，如 /posts?limit=20
+    headers: Dict[str, str] = {}  # 额外的请求头，如 If-None-Match
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+class BatchResponseItem(BaseModel):
+    """单个子请求的结果"""
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
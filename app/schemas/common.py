@@ -3,7 +3,7 @@
 """
 
 from typing import Generic, TypeVar, Optional, Union, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 DataT = TypeVar('DataT')
 
@@ -13,7 +13,10 @@ class ResponseModel(BaseModel, Generic[DataT]):
     支持两种数据格式：
     1. 成功响应：直接返回数据对象
     2. 错误响应：返回包含错误信息的字典
+
+    data 按 DataT / Dict / str 的顺序匹配，成功响应只校验一次
     """
     code: int = 200
     msg: str = "操作成功"
-    data: Union[DataT, Dict[str, Any], str] = {} 
\ No newline at end of file
+    data: Union[DataT, Dict[str, Any], str] = Field(default={}, union_mode="left_to_right")
+    next_cursor: Optional[str] = None  # 列表接口的下一页游标 
\ No newline at end of file
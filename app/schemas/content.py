@@ -4,7 +4,7 @@
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel, HttpUrl
+from pydantic import AliasChoices, BaseModel, Field, HttpUrl
 
 class ContentBase(BaseModel):
     title: str
@@ -31,8 +31,12 @@ class ContentInDBBase(ContentBase):
     user_id: int
     account_id: int
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # 未更新过的记录为空
     published_at: Optional[datetime] = None
+    # ORM模型中的列名为 meta_data (metadata 为SQLAlchemy保留属性)
+    metadata: Optional[Dict[str, Any]] = Field(
+        default={}, validation_alias=AliasChoices("meta_data", "metadata")
+    )
 
     class Config:
         from_attributes = True
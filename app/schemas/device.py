@@ -2,9 +2,9 @@
 设备相关的Pydantic模型
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 
 class DeviceBase(BaseModel):
     name: str
@@ -35,14 +35,39 @@ class DeviceHeartbeat(BaseModel):
     device_id: str
     status: str
     metrics: Optional[Dict[str, Any]] = None
+    config_version: Optional[int] = None  # 设备当前的配置版本，传入时响应中返回配置变化
+
+class DeviceCommand(BaseModel):
+    command: str
+    params: Dict[str, Any] = {}
+
+class DeviceToken(BaseModel):
+    device_token: str
+    token_type: str = "bearer"
+
+class DeviceMetricPoint(BaseModel):
+    name: str
+    bucket: datetime  # 汇总时间段的开始时间
+    count: int
+    avg: float
+    min: float
+    max: float
+
+class DeviceMetricSeries(BaseModel):
+    device_id: str
+    resolution: str  # 1m / 1h
+    points: List[DeviceMetricPoint]
 
 class DeviceInDBBase(DeviceBase):
     id: int
     user_id: int
     device_id: str
+    config_version: int = 0
     created_at: datetime
-    updated_at: datetime
-    last_active: Optional[datetime] = None
+    updated_at: Optional[datetime] = None  # 未更新过的记录为空
+    last_active: Optional[datetime] = Field(
+        default=None, validation_alias=AliasChoices("last_seen", "last_active")
+    )
 
     class Config:
         from_attributes = True
@@ -25,7 +25,7 @@ class TeamInDBBase(TeamBase):
     id: int
     owner_id: int
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # 未更新过的记录为空
 
     class Config:
         from_attributes = True
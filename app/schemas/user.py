@@ -21,4 +21,13 @@ class User(UserBase):
     is_superuser: bool = False
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserPrincipal(BaseModel):
+    """认证用户快照，仅包含鉴权所需字段"""
+    id: int
+    is_active: bool = True
+    is_superuser: bool = False
+
+    class Config:
+        from_attributes = True
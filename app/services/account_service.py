@@ -2,36 +2,60 @@
 账号服务模块
 """
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
+from app.cache.model_caches import account_cache
+from app.utils.pagination import apply_keyset
+from app.utils.fields import load_only_fields
+
 
 class AccountService:
-    async def get_account(self, db: Session, account_id: int) -> Optional[models.Account]:
-        return db.query(models.Account).filter(models.Account.id == account_id).first()
-    
+    async def get_account(self, db: AsyncSession, account_id: int) -> Optional[models.Account]:
+        """按ID获取账号，优先读缓存
+
+        缓存命中时返回的对象不绑定会话，修改前需重新从数据库加载
+        """
+        async def load():
+            result = await db.execute(
+                select(models.Account).where(models.Account.id == account_id)
+            )
+            return result.scalars().first()
+
+        return await account_cache.get_or_load(account_id, load)
+
     async def get_account_by_platform(
-        self, 
-        db: Session, 
+        self,
+        db: AsyncSession,
         user_id: int,
         platform: str,
         platform_id: str
     ) -> Optional[models.Account]:
-        return db.query(models.Account).filter(
-            models.Account.user_id == user_id,
-            models.Account.platform == platform,
-            models.Account.platform_id == platform_id
-        ).first()
-    
+        result = await db.execute(
+            select(models.Account).where(
+                models.Account.user_id == user_id,
+                models.Account.platform == platform,
+                models.Account.platform_id == platform_id
+            )
+        )
+        return result.scalars().first()
+
     async def get_user_accounts(
-        self, 
-        db: Session, 
+        self,
+        db: AsyncSession,
         user_id: int,
         skip: int = 0,
         limit: int = 100,
-        platform: Optional[str] = None
+        platform: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
     ) -> List[models.Account]:
-        query = db.query(models.Account).filter(models.Account.user_id == user_id)
+        stmt = select(models.Account).where(models.Account.user_id == user_id)
+        if fields:
+            stmt = stmt.options(load_only_fields(models.Account, schemas.Account, fields))
         if platform:
-            query = query.filter(models.Account.platform == platform)
-        return query.offset(skip).limit(limit).all() 
\ No newline at end of file
+            stmt = stmt.where(models.Account.platform == platform)
+        stmt = apply_keyset(stmt, models.Account, cursor, skip, limit)
+        result = await db.execute(stmt)
+        return result.scalars().all()
@@ -11,11 +11,30 @@
 支持多平台数据整合，提供统一的分析接口
 """
 
-from typing import Dict, Any, List
+import heapq
+from typing import Dict, Any, Iterator, List, Mapping, NamedTuple, Optional
 from datetime import datetime, timedelta
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from app import models
+from app.cache.decorators import cached
 from app.core.config import settings
+from app.utils.export import EXPORT_ID_WINDOW, EXPORT_OWNER_CHUNK
+
+# 导出类型 -> (分析数据模型, MySQL中的归属模型, 关联列)
+ANALYTICS_EXPORTS = {
+    "account": (models.AccountAnalytics, models.Account, "account_id"),
+    "content": (models.ContentAnalytics, models.Content, "content_id"),
+}
+
+_PERIOD_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+def _parse_period(period: str) -> timedelta:
+    """解析 24h / 7d / 4w 形式的时间范围"""
+    unit = _PERIOD_UNITS.get(period[-1:])
+    if unit is None or not period[:-1].isdigit():
+        raise ValueError(f"Invalid period: {period}")
+    return timedelta(**{unit: int(period[:-1])})
 
 class AnalyticsService:
     """数据分析服务
@@ -120,4 +139,169 @@ class AnalyticsService:
             created_at=datetime.utcnow()
         )
         postgres_db.add(analytics)
-        postgres_db.commit() 
\ No newline at end of file
+        postgres_db.commit()
+
+    @cached("analytics_summary", ttl=600, soft_ttl=120)
+    async def get_summary(
+        self,
+        mysql_db: Session,
+        postgres_db: Session,
+        user_id: int
+    ) -> Dict[str, Any]:
+        """获取用户的分析摘要
+
+        账号/内容统计在MySQL中聚合，互动数据在PostgreSQL中聚合，
+        结果缓存10分钟，2分钟后由一个请求重新计算，其余请求返回旧值
+        """
+        platform_rows = mysql_db.query(
+            models.Account.platform, func.count(models.Account.id)
+        ).filter(
+            models.Account.user_id == user_id
+        ).group_by(models.Account.platform).all()
+
+        status_rows = mysql_db.query(
+            models.Content.status, func.count(models.Content.id)
+        ).filter(
+            models.Content.user_id == user_id
+        ).group_by(models.Content.status).all()
+
+        content_ids = mysql_db.query(models.Content.id).filter(
+            models.Content.user_id == user_id
+        )
+        total_posts = sum(count for _, count in status_rows)
+        total_engagement = 0
+        if total_posts:
+            total_engagement = postgres_db.query(
+                func.coalesce(func.sum(models.EngagementMetrics.count), 0)
+            ).filter(
+                models.EngagementMetrics.content_id.in_([row.id for row in content_ids])
+            ).scalar()
+
+        return {
+            "total_accounts": sum(count for _, count in platform_rows),
+            "total_posts": total_posts,
+            "total_engagement": int(total_engagement),
+            "average_engagement_rate": total_engagement / total_posts if total_posts else 0.0,
+            "platform_distribution": {platform: count for platform, count in platform_rows},
+            "content_performance": {status or "unknown": count for status, count in status_rows}
+        }
+
+    @cached("analytics_trends", ttl=1800, soft_ttl=300)
+    async def get_trends(
+        self,
+        mysql_db: Session,
+        postgres_db: Session,
+        user_id: int,
+        platform: Optional[str] = None,
+        period: str = "7d"
+    ) -> Dict[str, Any]:
+        """获取账号指标的按天趋势
+
+        返回:
+            data_points: 每天各指标的合计
+            trends: 各指标首日到末日的变化
+        """
+        since = datetime.utcnow() - _parse_period(period)
+
+        accounts = mysql_db.query(models.Account.id).filter(models.Account.user_id == user_id)
+        if platform:
+            accounts = accounts.filter(models.Account.platform == platform)
+        account_ids = [row.id for row in accounts]
+        if not account_ids:
+            return {"platform": platform, "period": period, "data_points": [], "trends": {}}
+
+        rows = postgres_db.query(
+            models.AccountAnalytics.date, models.AccountAnalytics.metrics
+        ).filter(
+            models.AccountAnalytics.account_id.in_(account_ids),
+            models.AccountAnalytics.date >= since
+        ).order_by(models.AccountAnalytics.date).all()
+
+        daily: Dict[str, Dict[str, float]] = {}
+        for row in rows:
+            totals = daily.setdefault(row.date.date().isoformat(), {})
+            for name, value in (row.metrics or {}).items():
+                if isinstance(value, (int, float)):
+                    totals[name] = totals.get(name, 0) + value
+
+        data_points = [{"date": day, **metrics} for day, metrics in daily.items()]
+        trends = {}
+        if data_points:
+            first, last = data_points[0], data_points[-1]
+            for name in last:
+                if name == "date":
+                    continue
+                start, end = first.get(name, 0), last[name]
+                trends[name] = {
+                    "start": start,
+                    "end": end,
+                    "change": end - start,
+                    "change_rate": (end - start) / start if start else 0.0
+                }
+
+        return {"platform": platform, "period": period, "data_points": data_points, "trends": trends}
+
+    def analytics_export_scope(self, mysql_db: Session, user_id: int, kind: str) -> "AnalyticsExportScope":
+        """确定导出的分析数据表和属于该用户的归属id (账号或内容id)"""
+        model, owner_model, column = ANALYTICS_EXPORTS[kind]
+        owner_ids = [
+            row.id
+            for row in mysql_db.query(owner_model.id)
+            .filter(owner_model.user_id == user_id)
+            .order_by(owner_model.id)
+        ]
+        table = model.__table__
+        return AnalyticsExportScope(table, table.c[column], owner_ids)
+
+    def get_max_analytics_id(self, postgres_db: Session, scope: "AnalyticsExportScope") -> Optional[int]:
+        max_ids = [
+            postgres_db.execute(
+                select(func.max(scope.table.c.id)).where(scope.column.in_(chunk))
+            ).scalar()
+            for chunk in scope.chunks()
+        ]
+        return max((i for i in max_ids if i is not None), default=None)
+
+    def stream_analytics(
+        self,
+        postgres_db: Session,
+        scope: "AnalyticsExportScope",
+        after_id: int = 0,
+        until_id: Optional[int] = None
+    ) -> Iterator[Mapping[str, Any]]:
+        """按id顺序逐行读取分析数据
+
+        每条查询只覆盖 EXPORT_ID_WINDOW 个id和 EXPORT_OWNER_CHUNK 个归属id，语句大小和单次读取的行数有上限；
+        同一id范围内各批归属id的结果按id归并后输出
+        同步生成器，由StreamingResponse在线程池中迭代
+        """
+        if until_id is None:
+            until_id = self.get_max_analytics_id(postgres_db, scope)
+        if until_id is None:
+            return
+        table = scope.table
+        chunks = list(scope.chunks())
+        start = after_id
+        while start < until_id:
+            end = min(start + EXPORT_ID_WINDOW, until_id)
+            batches = [
+                postgres_db.execute(
+                    select(table)
+                    .where(scope.column.in_(chunk), table.c.id > start, table.c.id <= end)
+                    .order_by(table.c.id)
+                ).mappings().all()
+                for chunk in chunks
+            ]
+            yield from heapq.merge(*batches, key=lambda row: row["id"])
+            start = end
+
+
+class AnalyticsExportScope(NamedTuple):
+    """分析数据导出的范围：数据表、关联列和用户拥有的归属id"""
+    table: Any
+    column: Any
+    owner_ids: List[int]
+
+    def chunks(self) -> Iterator[List[int]]:
+        for start in range(0, len(self.owner_ids), EXPORT_OWNER_CHUNK):
+            yield self.owner_ids[start:start + EXPORT_OWNER_CHUNK]
@@ -12,26 +12,24 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app import models, schemas
+from app.core import security
 from app.core.config import settings
 from app.utils.logger import logger
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class AuthService:
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """验证密码"""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """验证密码 (在 PasswordHasher 的执行器中计算，不阻塞事件循环)"""
+        return await security.password_hasher.verify(plain_password, hashed_password)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        """生成密码哈希"""
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        """生成密码哈希 (在 PasswordHasher 的执行器中计算，不阻塞事件循环)"""
+        return await security.password_hasher.hash(password)
 
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -45,12 +43,12 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
         return encoded_jwt
 
-    def authenticate_user(self, db: Session, email: str, password: str) -> Optional[models.User]:
+    async def authenticate_user(self, db: Session, email: str, password: str) -> Optional[models.User]:
         """验证用户"""
         user = db.query(models.User).filter(models.User.email == email).first()
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
 
@@ -71,7 +69,7 @@ class AuthService:
             # 创建新用户
             db_user = models.User(
                 email=user_create.email,
-                hashed_password=self.get_password_hash(user_create.password),
+                hashed_password=await self.get_password_hash(user_create.password),
                 is_active=True
             )
             db.add(db_user)
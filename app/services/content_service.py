@@ -11,24 +11,136 @@
 集成了文件存储服务，支持多种媒体格式
 """
 
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Mapping, Optional, Tuple
 from fastapi import HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
 from app.services.storage_service import StorageService
-from app.cache.redis import RedisCache
+from app.cache.redis import RedisCache, make_key, redis_client
+from app.core.config import settings
+from app.cache.model_caches import content_cache
 from app.utils.logger import logger
 from app.tasks.content import publish_content
 from app.platforms.factory import PlatformFactory
+from app.utils.pagination import apply_keyset
+from app.utils.export import EXPORT_BATCH_SIZE
+from app.utils.fields import load_only_fields
+
 
 class ContentService:
     def __init__(self):
         self.storage = StorageService()
         self.cache = RedisCache()
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[models.Content]:
+        """根据ID获取内容，优先读缓存
+
+        缓存命中时返回的对象不绑定会话，修改前需重新从数据库加载
+        """
+        async def load():
+            result = await db.execute(
+                select(models.Content).where(models.Content.id == id)
+            )
+            return result.scalars().first()
+
+        return await content_cache.get_or_load(id, load)
+
+    async def get_user_contents(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> List[models.Content]:
+        """获取用户的内容列表，传入cursor时使用游标分页，传入fields时只查询对应的列"""
+        stmt = select(models.Content).where(models.Content.user_id == user_id)
+        if fields:
+            stmt = stmt.options(load_only_fields(models.Content, schemas.Content, fields))
+        result = await db.execute(
+            apply_keyset(stmt, models.Content, cursor, skip, limit)
+        )
+        return result.scalars().all()
+
+    async def get_max_content_id(self, db: AsyncSession, user_id: int) -> Optional[int]:
+        """用户内容的最大id，作为导出范围的上界"""
+        result = await db.execute(
+            select(func.max(models.Content.id)).where(models.Content.user_id == user_id)
+        )
+        return result.scalar()
+
+    async def stream_user_contents(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        after_id: int = 0,
+        until_id: Optional[int] = None
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        """按id顺序逐行读取用户的全部内容 (服务端游标，不构建ORM对象)"""
+        table = models.Content.__table__
+        stmt = select(table).where(
+            table.c.user_id == user_id,
+            table.c.id > after_id
+        ).order_by(table.c.id)
+        if until_id is not None:
+            stmt = stmt.where(table.c.id <= until_id)
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for row in result.mappings():
+            yield row
+
+    async def create(
+        self,
+        db: AsyncSession,
+        obj_in: schemas.ContentCreate,
+        user_id: int
+    ) -> models.Content:
+        """创建内容记录"""
+        content = models.Content(
+            title=obj_in.title,
+            content=obj_in.content,
+            content_type=obj_in.content_type,
+            platform=obj_in.platform,
+            status=obj_in.status,
+            scheduled_time=obj_in.scheduled_time,
+            meta_data=obj_in.metadata,
+            account_id=obj_in.account_id,
+            user_id=user_id
+        )
+        db.add(content)
+        await db.commit()
+        await db.refresh(content)
+        return content
+
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: models.Content,
+        obj_in: schemas.ContentUpdate
+    ) -> models.Content:
+        """更新内容记录"""
+        if db_obj not in db:
+            db_obj = await db.get(models.Content, db_obj.id)
+        update_data = obj_in.dict(exclude_unset=True)
+        if "metadata" in update_data:
+            update_data["meta_data"] = update_data.pop("metadata")
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, db: AsyncSession, id: int) -> None:
+        """删除内容记录"""
+        content = await db.get(models.Content, id)
+        if content:
+            await db.delete(content)
+            await db.commit()
     
     async def create_content(
         self,
-        db: Session,
+        db: AsyncSession,
         content_data: schemas.ContentCreate,
         media_files: List[UploadFile],
         user: models.User
@@ -48,19 +160,19 @@ class ContentService:
                 title=content_data.title,
                 content=content_data.content,
                 media_urls=media_urls,
-                schedule_time=content_data.schedule_time,
+                scheduled_time=content_data.schedule_time,
                 platforms=content_data.platforms,
                 status="draft",
                 user_id=user.id
             )
             
             db.add(content)
-            db.commit()
-            db.refresh(content)
+            await db.commit()
+            await db.refresh(content)
             
             # 如果需要立即发布
             if content_data.publish_now:
-                publish_content.delay(content.id)
+                await self.enqueue_publish(content.id)
                 
             return content
             
@@ -68,9 +180,27 @@ class ContentService:
             logger.error(f"Failed to create content: {str(e)}")
             raise 
 
-    async def publish_post(self, db: Session, post_id: int) -> Dict[str, Any]:
+    async def enqueue_publish(self, content_id: int) -> bool:
+        """投递发布任务，PUBLISH_DEDUPE_TTL 内同一内容只投递一次
+
+        返回是否投递；Redis不可用时照常投递，由任务内的状态检查去重
+        """
+        try:
+            first = await redis_client.set(
+                make_key(f"publish:{content_id}"), 1, nx=True, ex=settings.PUBLISH_DEDUPE_TTL
+            )
+        except Exception as e:
+            logger.warning(f"发布去重检查失败 {content_id}: {str(e)}")
+            first = True
+        if not first:
+            logger.info(f"内容 {content_id} 的发布任务已投递，忽略重复请求")
+            return False
+        publish_content.delay(content_id)
+        return True
+
+    async def publish_post(self, db: AsyncSession, post_id: int) -> Dict[str, Any]:
         """发布内容到多个平台"""
-        post = await self.get_post(db, post_id)
+        post = await db.get(models.Content, post_id)
         if not post:
             raise ValueError("Post not found")
 
@@ -94,12 +224,12 @@ class ContentService:
                 # 更新发布状态
                 post.status = "published"
                 post.analytics[platform_name] = result
-                db.commit()
+                await db.commit()
                 
             except Exception as e:
                 logger.error(f"Failed to publish to {platform_name}: {str(e)}")
                 post.status = "failed"
-                db.commit()
+                await db.commit()
                 raise
         
         return {
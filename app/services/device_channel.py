@@ -0,0 +1,215 @@
+"""
+设备长连接服务模块
+
+设备通过 /devices/ws 保持一条WebSocket连接：
+1. 心跳以轻量帧上报，直接写入心跳缓冲和指标缓冲 (不经过HTTP请求和数据库)
+2. 配置变更、任务等命令通过同一条连接下发；心跳带配置版本时只下发增量
+3. 设备可能连接在任意worker上，命令经Redis发布/订阅转发，
+   每个worker只有一个订阅连接，只推送给连接在本进程的设备
+"""
+
+import asyncio
+import uuid
+from typing import Any, Dict, Optional, Set
+import orjson
+from fastapi import WebSocket
+from app import models
+from app.cache.heartbeat import heartbeat_buffer
+from app.cache.redis import loads, make_key, redis_client
+from app.core.config import settings
+from app.db.session import MySQLSessionLocal
+from app.services.device_metrics_service import device_metrics_buffer
+from app.services.device_service import DeviceService
+from app.utils.logger import logger
+
+
+device_service = DeviceService()
+
+def command_channel() -> str:
+    return make_key(settings.DEVICE_COMMAND_CHANNEL)
+
+
+class DeviceConnection:
+    """一个已认证的设备连接"""
+
+    def __init__(self, websocket: WebSocket, device: models.Device):
+        self.websocket = websocket
+        self.device_id = device.device_id
+        self.device = device
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await asyncio.wait_for(
+            self.websocket.send_bytes(orjson.dumps(message)),
+            settings.DEVICE_WS_SEND_TIMEOUT
+        )
+
+
+class DeviceChannel:
+    """设备连接管理和命令下发"""
+
+    def __init__(self):
+        self.connections: Dict[str, DeviceConnection] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+
+    # 命令下发
+
+    async def send_command(self, device_id: str, command_type: str, data: Dict[str, Any]) -> str:
+        """向设备下发命令，设备连接在任意worker上都能收到，返回命令id
+
+        设备不在线时命令被丢弃，设备重连后应主动拉取最新配置
+        """
+        command_id = uuid.uuid4().hex
+        message = {"id": command_id, "type": command_type, "data": data}
+        try:
+            await redis_client.publish(
+                command_channel(),
+                orjson.dumps({"device_id": device_id, "message": message})
+            )
+        except Exception as e:
+            logger.warning(f"设备命令发布失败，尝试直接推送 {device_id}: {str(e)}")
+            await self._deliver(device_id, message)
+        return command_id
+
+    async def _deliver(self, device_id: str, message: Dict[str, Any]) -> None:
+        connection = self.connections.get(device_id)
+        if connection is None:
+            return
+        try:
+            await connection.send(message)
+        except Exception as e:
+            logger.warning(f"设备命令推送失败，断开连接 {device_id}: {str(e)}")
+            await self._close(connection, code=1011)
+
+    # 连接管理
+
+    @staticmethod
+    async def _close(connection: DeviceConnection, code: int = 1000) -> None:
+        """关闭连接，连接的清理由 serve() 负责"""
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _handle_frame(self, connection: DeviceConnection, raw: Any) -> None:
+        try:
+            frame = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            await connection.send({"type": "error", "data": {"detail": "帧格式错误"}})
+            return
+        if not isinstance(frame, dict):
+            return
+        frame_type = frame.get("type")
+        if frame_type == "heartbeat":
+            status = frame.get("status") or "online"
+            try:
+                await heartbeat_buffer.record(connection.device_id, str(status), device=connection.device)
+            except Exception as e:
+                logger.warning(f"设备心跳写入失败 {connection.device_id}: {str(e)}")
+            metrics = frame.get("metrics")
+            if isinstance(metrics, dict):
+                device_metrics_buffer.add(connection.device_id, metrics)
+            config_version = frame.get("config_version")
+            if isinstance(config_version, int):
+                await self._sync_config(connection, config_version)
+        elif frame_type == "ping":
+            await connection.send({"type": "pong"})
+        elif frame_type == "ack":
+            logger.debug(f"设备 {connection.device_id} 确认命令 {frame.get('id')}")
+        else:
+            await connection.send({"type": "error", "data": {"detail": f"未知的帧类型 {frame_type}"}})
+
+    @staticmethod
+    async def _sync_config(connection: DeviceConnection, config_version: int) -> None:
+        """配置版本落后时下发增量，版本号与缓存一致时不访问数据库"""
+        db = MySQLSessionLocal()
+        try:
+            delta = await device_service.sync_config(db, connection.device_id, config_version)
+        except Exception as e:
+            logger.warning(f"设备配置同步失败 {connection.device_id}: {str(e)}")
+            return
+        finally:
+            db.close()
+        if delta["status"] != "unchanged":
+            await connection.send({"id": uuid.uuid4().hex, "type": "config", "data": delta})
+
+    async def serve(self, websocket: WebSocket, device: models.Device) -> None:
+        """处理一个已认证设备的连接，直到断开
+
+        同一设备的新连接会替换旧连接
+        """
+        await websocket.accept()
+        connection = DeviceConnection(websocket, device)
+        previous = self.connections.get(device.device_id)
+        self.connections[device.device_id] = connection
+        if previous is not None:
+            await self._close(previous, code=4000)
+
+        try:
+            await heartbeat_buffer.record(device.device_id, "online", device=device)
+            while True:
+                message = await asyncio.wait_for(websocket.receive(), settings.DEVICE_WS_IDLE_TIMEOUT)
+                if message["type"] == "websocket.disconnect":
+                    break
+                raw = message.get("bytes") or message.get("text")
+                if raw:
+                    await self._handle_frame(connection, raw)
+        except asyncio.TimeoutError:
+            logger.info(f"设备 {device.device_id} 长时间无数据，断开连接")
+        except Exception as e:
+            logger.warning(f"设备连接异常 {device.device_id}: {str(e)}")
+        finally:
+            # 已被新连接替换时不更新状态
+            if self.connections.get(device.device_id) is connection:
+                del self.connections[device.device_id]
+                try:
+                    await heartbeat_buffer.record(device.device_id, "offline", device=device)
+                except Exception as e:
+                    logger.warning(f"设备离线状态写入失败 {device.device_id}: {str(e)}")
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+    # 跨worker转发
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(command_channel())
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = loads(message["data"])
+                    if payload.get("device_id") in self.connections:
+                        # 单个设备推送慢时不阻塞其他设备的命令
+                        task = asyncio.get_running_loop().create_task(
+                            self._deliver(payload["device_id"], payload["message"])
+                        )
+                        self._deliveries.add(task)
+                        task.add_done_callback(self._deliveries.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"设备命令订阅中断，稍后重连: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for connection in list(self.connections.values()):
+            await self._close(connection, code=1001)
+
+device_channel = DeviceChannel()
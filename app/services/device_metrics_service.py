@@ -0,0 +1,256 @@
+"""
+设备指标服务模块
+
+心跳中的 metrics (CPU、电量、队列长度等) 写入PostgreSQL时序表：
+1. 指标先进入进程内缓冲，按批量或按时间间隔用多行INSERT写入 device_metrics
+2. Celery beat 定期把原始指标聚合为1分钟、1小时两级汇总 (可重复执行，结果覆盖)
+3. 范围查询只读汇总表，按时间跨度自动选择精度
+4. 原始指标和1分钟汇总按保留期清理
+
+缓冲中的指标在进程异常退出时会丢失 (最多一个刷新间隔)，正常关闭时会先写入
+"""
+
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.cache.redis import make_key, sync_redis_client
+from app.core.config import settings
+from app.db.session import AsyncPostgresSessionLocal
+from app.utils.logger import logger
+
+RESOLUTIONS = {
+    "1m": models.DeviceMetricMinute,
+    "1h": models.DeviceMetricHour,
+}
+_ROLLUP_COLUMNS = ["device_id", "name", "bucket", "count", "sum", "min", "max"]
+_ROLLUP_WATERMARK = make_key("device_metrics:rollup_watermark")
+_MAX_NAME_LENGTH = 64
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """展开心跳中的指标，嵌套字段以 . 连接，只保留数值"""
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten_metrics(value, f"{name}.")
+        elif isinstance(value, (bool, int, float)) and math.isfinite(value):
+            if len(name) <= _MAX_NAME_LENGTH:
+                yield name, float(value)
+
+def _utc(value: datetime) -> datetime:
+    """查询参数中不带时区的时间按UTC处理"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _floor(value: datetime, unit: timedelta) -> datetime:
+    seconds = unit.total_seconds()
+    return datetime.fromtimestamp(value.timestamp() // seconds * seconds, tz=timezone.utc)
+
+
+class DeviceMetricsBuffer:
+    """进程内的指标缓冲，批量写入PostgreSQL"""
+
+    def __init__(
+        self,
+        batch_size: int = settings.DEVICE_METRICS_BATCH_SIZE,
+        flush_interval: float = settings.DEVICE_METRICS_FLUSH_INTERVAL,
+        max_buffer: int = settings.DEVICE_METRICS_MAX_BUFFER
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, device_id: str, metrics: Optional[Dict[str, Any]]) -> int:
+        """加入一次心跳的指标，返回加入的指标数"""
+        if not metrics:
+            return 0
+        ts = datetime.now(timezone.utc)
+        rows = [
+            {"device_id": device_id, "name": name, "value": value, "ts": ts}
+            for name, value in flatten_metrics(metrics)
+        ][:settings.DEVICE_METRICS_MAX_PER_HEARTBEAT]
+        if len(self._rows) + len(rows) > self.max_buffer:
+            # 数据库长时间不可用时丢弃新数据，避免占满内存
+            self.dropped += len(rows)
+            return 0
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_now())
+        return len(rows)
+
+    async def _flush_now(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            self._flush_task = None
+
+    async def flush(self) -> int:
+        """写入缓冲中的全部指标，写入失败时放回缓冲等待下一次重试"""
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                async with AsyncPostgresSessionLocal() as db:
+                    for start in range(0, len(rows), self.batch_size):
+                        await db.execute(
+                            insert(models.DeviceMetric).values(rows[start:start + self.batch_size])
+                        )
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"设备指标写入失败，{len(rows)} 条稍后重试: {str(e)}")
+                self._rows[:0] = rows[:max(self.max_buffer - len(self._rows), 0)]
+                return 0
+            if self.dropped:
+                logger.warning(f"设备指标缓冲已满，丢弃 {self.dropped} 条")
+                self.dropped = 0
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"设备指标定时写入错误: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+device_metrics_buffer = DeviceMetricsBuffer()
+
+
+class DeviceMetricsService:
+    async def get_metrics(
+        self,
+        postgres_db: Session,
+        device_id: str,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        names: Optional[Sequence[str]] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """按时间范围查询设备指标的汇总数据
+
+        未指定 resolution 时，跨度不超过 DEVICE_METRICS_MINUTE_RANGE_HOURS 小时用1分钟汇总，否则用1小时汇总
+        返回 (实际使用的精度, 数据点列表)
+        """
+        start, end = _utc(start), _utc(end)
+        if resolution is None:
+            minute_range = timedelta(hours=settings.DEVICE_METRICS_MINUTE_RANGE_HOURS)
+            resolution = "1m" if end - start <= minute_range else "1h"
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        table = RESOLUTIONS[resolution]
+
+        stmt = (
+            select(
+                table.name,
+                table.bucket,
+                table.count,
+                (table.sum / table.count).label("avg"),
+                table.min,
+                table.max,
+            )
+            .where(table.device_id == device_id, table.bucket >= start, table.bucket < end)
+            .order_by(table.name, table.bucket)
+            .limit(settings.DEVICE_METRICS_MAX_POINTS)
+        )
+        if names:
+            stmt = stmt.where(table.name.in_(list(names)))
+        rows = postgres_db.execute(stmt).mappings().all()
+        return resolution, [dict(row) for row in rows]
+
+    def rollup(self, postgres_db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """把上次聚合之后已经完整的分钟聚合为1分钟、1小时汇总
+
+        最近 DEVICE_METRICS_ROLLUP_DELAY 秒内的数据可能仍在各进程的缓冲中，留到下一次处理；
+        重复处理同一时间段时覆盖已有结果，不会重复计数
+        """
+        now = now or datetime.now(timezone.utc)
+        minute, hour = timedelta(minutes=1), timedelta(hours=1)
+        end = _floor(now - timedelta(seconds=settings.DEVICE_METRICS_ROLLUP_DELAY), minute)
+        earliest = end - timedelta(days=settings.DEVICE_METRICS_RAW_RETENTION_DAYS)
+        watermark = sync_redis_client.get(_ROLLUP_WATERMARK)
+        if watermark is not None:
+            start = max(datetime.fromtimestamp(float(watermark), tz=timezone.utc), earliest)
+        else:
+            start = end - hour
+        if start >= end:
+            return {"start": start, "end": end, "minutes": 0, "hours": 0}
+
+        raw = models.DeviceMetric
+        bucket = func.date_trunc("minute", raw.ts)
+        minutes = self._upsert(
+            postgres_db,
+            models.DeviceMetricMinute,
+            select(
+                raw.device_id, raw.name, bucket,
+                func.count(), func.sum(raw.value), func.min(raw.value), func.max(raw.value)
+            )
+            .where(raw.ts >= start, raw.ts < end)
+            .group_by(raw.device_id, raw.name, bucket)
+        )
+
+        # 小时汇总从1分钟汇总计算，未结束的小时在之后的执行中继续覆盖
+        per_minute = models.DeviceMetricMinute
+        bucket = func.date_trunc("hour", per_minute.bucket)
+        hours = self._upsert(
+            postgres_db,
+            models.DeviceMetricHour,
+            select(
+                per_minute.device_id, per_minute.name, bucket,
+                func.sum(per_minute.count), func.sum(per_minute.sum),
+                func.min(per_minute.min), func.max(per_minute.max)
+            )
+            .where(per_minute.bucket >= _floor(start, hour), per_minute.bucket < end)
+            .group_by(per_minute.device_id, per_minute.name, bucket)
+        )
+        postgres_db.commit()
+        sync_redis_client.set(_ROLLUP_WATERMARK, end.timestamp())
+        return {"start": start, "end": end, "minutes": minutes, "hours": hours}
+
+    @staticmethod
+    def _upsert(postgres_db: Session, table: Any, source: Any) -> int:
+        stmt = pg_insert(table).from_select(_ROLLUP_COLUMNS, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device_id", "name", "bucket"],
+            set_={column: stmt.excluded[column] for column in ("count", "sum", "min", "max")}
+        )
+        return postgres_db.execute(stmt).rowcount
+
+    def prune(self, postgres_db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """删除超过保留期的原始指标和1分钟汇总"""
+        now = now or datetime.now(timezone.utc)
+        raw = postgres_db.execute(
+            delete(models.DeviceMetric).where(
+                models.DeviceMetric.ts < now - timedelta(days=settings.DEVICE_METRICS_RAW_RETENTION_DAYS)
+            )
+        ).rowcount
+        minutes = postgres_db.execute(
+            delete(models.DeviceMetricMinute).where(
+                models.DeviceMetricMinute.bucket < now - timedelta(days=settings.DEVICE_METRICS_MINUTE_RETENTION_DAYS)
+            )
+        ).rowcount
+        postgres_db.commit()
+        return {"raw": raw, "minutes": minutes}
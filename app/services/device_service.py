@@ -1,20 +1,42 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.utils.fields import load_only_fields
+from app.utils.jsonpatch import make_patch
+from app.cache.heartbeat import heartbeat_buffer
+from app.cache.redis import make_key, redis_client
+from app.core.config import settings
+from app.utils.logger import logger
+
+# KEYS[1]: 版本号缓存  ARGV: 版本号, 过期时间(秒)
+# 只在缓存不存在或更旧时写入，并发的读取和修改不会把缓存改回旧版本；
+# 版本号可能变小的写入 (修改配置、重新注册) 在提交前删除缓存，由 sync_config 从数据库重新填充
+_SET_NEWER_VERSION = """
+local current = redis.call("GET", KEYS[1])
+if current and tonumber(current) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+return 1
+"""
+_set_newer_version = redis_client.register_script(_SET_NEWER_VERSION)
+
+def _config_version_key(device_id: str) -> str:
+    return make_key(f"devcfg:ver:{device_id}")
 
 class DeviceService:
     async def register_device(
         self,
         db: Session,
-        device_data: schemas.DeviceCreate,
-        user: models.User
+        device_in: schemas.DeviceRegister,
+        user_id: int
     ) -> models.Device:
         # 检查设备是否已存在
         existing_device = (
             db.query(models.Device)
-            .filter(models.Device.device_id == device_data.device_id)
+            .filter(models.Device.device_id == device_in.device_id)
             .first()
         )
         if existing_device:
@@ -24,11 +46,18 @@ class DeviceService:
             )
         
         device = models.Device(
-            name=device_data.name,
-            device_id=device_data.device_id,
-            user_id=user.id
+            name=device_in.name,
+            device_type=device_in.device_type,
+            device_id=device_in.device_id,
+            config=device_in.config,
+            config_version=1,
+            user_id=user_id
         )
         db.add(device)
+        db.flush()
+        db.add(models.DeviceConfigVersion(device_id=device.id, version=1, config=device_in.config))
+        # 同一 device_id 删除后重新注册时，缓存中可能还有旧设备更大的版本号
+        await self._invalidate_config_version(db, device.device_id)
         db.commit()
         db.refresh(device)
         return device
@@ -54,4 +83,168 @@ class DeviceService:
         device.last_seen = datetime.utcnow()
         db.commit()
         db.refresh(device)
-        return device 
\ No newline at end of file
+        return device
+
+    async def get_user_devices(
+        self,
+        db: Session,
+        user_id: int,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> List[models.Device]:
+        query = db.query(models.Device).filter(models.Device.user_id == user_id)
+        if fields:
+            query = query.options(load_only_fields(models.Device, schemas.Device, fields))
+        devices = query.order_by(models.Device.id).all()
+        return await heartbeat_buffer.apply(devices)
+
+    async def get_device(self, db: Session, device_id: str) -> Optional[models.Device]:
+        device = (
+            db.query(models.Device)
+            .filter(models.Device.device_id == device_id)
+            .first()
+        )
+        if device is not None:
+            await heartbeat_buffer.apply([device])
+        return device
+
+    async def update_config(
+        self,
+        db: Session,
+        device: models.Device,
+        config: dict
+    ) -> models.Device:
+        """修改设备配置，版本号加1并保存到配置历史"""
+        # 锁定设备行，并发修改时版本号依次递增
+        db.refresh(device, with_for_update=True)
+        version = (device.config_version or 0) + 1
+        device.config = config
+        device.config_version = version
+        db.add(models.DeviceConfigVersion(device_id=device.id, version=version, config=config))
+        db.query(models.DeviceConfigVersion).filter(
+            models.DeviceConfigVersion.device_id == device.id,
+            models.DeviceConfigVersion.version <= version - settings.DEVICE_CONFIG_HISTORY
+        ).delete(synchronize_session=False)
+        await self._invalidate_config_version(db, device.device_id)
+        db.commit()
+        db.refresh(device)
+        await self._cache_config_version(device.device_id, version)
+        return device
+
+    @staticmethod
+    async def _invalidate_config_version(db: Session, device_id: str) -> None:
+        """提交前删除版本号缓存，删除失败时回滚，避免设备一直收到 unchanged"""
+        try:
+            await redis_client.delete(_config_version_key(device_id))
+        except Exception as e:
+            db.rollback()
+            logger.error(f"删除设备配置版本号缓存失败 {device_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def _cache_config_version(device_id: str, version: int) -> None:
+        try:
+            await _set_newer_version(
+                keys=[_config_version_key(device_id)],
+                args=[version, settings.DEVICE_CONFIG_VERSION_TTL]
+            )
+        except Exception as e:
+            logger.warning(f"缓存设备配置版本号失败 {device_id}: {str(e)}")
+            # 写入失败时不能保留可能过期的值，删除后由下一次 sync_config 从数据库填充
+            try:
+                await redis_client.delete(_config_version_key(device_id))
+            except Exception as delete_error:
+                logger.error(f"删除设备配置版本号缓存失败 {device_id}: {str(delete_error)}")
+
+    @staticmethod
+    async def _cached_config_version(device_id: str) -> Optional[int]:
+        try:
+            version = await redis_client.get(_config_version_key(device_id))
+        except Exception as e:
+            logger.warning(f"读取设备配置版本号失败 {device_id}: {str(e)}")
+            return None
+        return int(version) if version is not None else None
+
+    async def config_delta(
+        self,
+        db: Session,
+        device: models.Device,
+        base_version: Optional[int]
+    ) -> Dict[str, Any]:
+        """生成从 base_version 到当前版本的配置变化
+
+        status 为 unchanged (版本一致)、patch (JSON Patch 增量) 或 full (历史中没有
+        base_version 时返回完整配置)
+        """
+        version = device.config_version or 0
+        if base_version == version:
+            return {"status": "unchanged", "version": version}
+        if base_version is not None and 0 < base_version < version:
+            base = db.get(models.DeviceConfigVersion, (device.id, base_version))
+            if base is not None:
+                return {
+                    "status": "patch",
+                    "base_version": base_version,
+                    "version": version,
+                    "patch": make_patch(base.config or {}, device.config or {}),
+                }
+        return {"status": "full", "version": version, "config": device.config or {}}
+
+    async def sync_config(
+        self,
+        db: Session,
+        device_id: str,
+        client_version: Optional[int]
+    ) -> Dict[str, Any]:
+        """设备上报当前配置版本，返回配置变化
+
+        版本号与Redis中缓存的一致时直接返回 unchanged，不查询数据库；
+        缓存不存在时从数据库读取并重新填充
+        """
+        if client_version is not None:
+            cached = await self._cached_config_version(device_id)
+            if cached is not None and cached == client_version:
+                return {"status": "unchanged", "version": cached}
+
+        device = (
+            db.query(models.Device)
+            .filter(models.Device.device_id == device_id)
+            .first()
+        )
+        if not device:
+            raise HTTPException(
+                status_code=404,
+                detail="Device not found"
+            )
+        await self._cache_config_version(device_id, device.config_version or 0)
+        return await self.config_delta(db, device, client_version)
+
+    async def update_heartbeat(
+        self,
+        db: Session,
+        device_id: str,
+        status: str
+    ) -> None:
+        """记录设备心跳
+
+        心跳写入Redis缓冲，由 flush_heartbeats 任务批量写回数据库；
+        只有Redis中还没有该设备时才查询数据库，Redis不可用时直接更新数据库
+        """
+        try:
+            if await heartbeat_buffer.record(device_id, status):
+                return
+            device = (
+                db.query(models.Device)
+                .filter(models.Device.device_id == device_id)
+                .first()
+            )
+            if not device:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Device not found"
+                )
+            await heartbeat_buffer.record(device_id, status, device=device)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.warning(f"心跳写入Redis失败，直接更新数据库 {device_id}: {str(e)}")
+            await self.update_device_status(db, device_id=device_id, status=status)
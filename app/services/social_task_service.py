@@ -1,8 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import models, schemas
 from app.core.celery_app import celery_app
+from app.utils.pagination import apply_keyset
 
 class SocialTaskService:
     def __init__(self):
@@ -50,15 +51,11 @@ class SocialTaskService:
         db: Session,
         user: models.User,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[models.Task]:
-        return (
-            db.query(models.Task)
-            .filter(models.Task.user_id == user.id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = db.query(models.Task).filter(models.Task.user_id == user.id)
+        return apply_keyset(query, models.Task, cursor, skip, limit).all()
 
     def _handle_tiktok_task(self, task: models.Task, config: Dict[str, Any]):
         """处理抖音相关任务"""
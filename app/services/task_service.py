@@ -2,6 +2,7 @@ from typing import List, Optional
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import crud, models, schemas
+from app.utils.pagination import apply_keyset
 
 class TaskService:
     def create_task(
@@ -31,9 +32,16 @@ class TaskService:
         db: Session,
         user: models.User,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[models.Task]:
-        """Get all tasks for a user."""
+        """Get all tasks for a user.
+
+        When a cursor is given, page by task id instead of offset.
+        """
+        if cursor:
+            query = db.query(models.Task).filter(models.Task.user_id == user.id)
+            return apply_keyset(query, models.Task, cursor, skip, limit).all()
         return crud.task.get_multi_by_owner(
             db=db,
             owner_id=user.id,
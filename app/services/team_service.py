@@ -5,6 +5,10 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.cache.decorators import cached
+from app.cache.model_caches import team_cache
+from app.core.events import WriteEvent, register_write_listener
+
 
 class TeamService:
     """
@@ -35,9 +39,10 @@ class TeamService:
         # 返回新创建的团队对象
         return team
     
+    @cached("user_teams", ttl=300, soft_ttl=60, model=models.Team)
     async def get_user_teams(self, db: Session, user_id: int) -> List[models.Team]:
         """
-        获取指定用户的团队列表。
+        获取指定用户的团队列表，结果缓存，团队增删改后失效。
         
         参数:
         - db: 数据库会话。
@@ -49,6 +54,17 @@ class TeamService:
         # 查询数据库中所有属于指定用户的团队
         return db.query(models.Team).filter(models.Team.owner_id == user_id).all()
     
+    async def get_team(self, db: Session, team_id: int) -> Optional[models.Team]:
+        """
+        按ID获取团队，优先读缓存。
+
+        缓存命中时返回的对象不绑定会话，修改前需重新从数据库加载。
+        """
+        async def load():
+            return db.query(models.Team).filter(models.Team.id == team_id).first()
+
+        return await team_cache.get_or_load(team_id, load)
+
     async def is_team_admin(self, db: Session, team_id: int, user_id: int) -> bool:
         """
         检查用户是否是指定团队的管理员。
@@ -64,4 +80,18 @@ class TeamService:
         # 查询指定ID的团队信息
         team = db.query(models.Team).filter(models.Team.id == team_id).first()
         # 检查团队是否存在且所有者ID与用户ID匹配
-        return team and team.owner_id == user_id
\ No newline at end of file
+        return team and team.owner_id == user_id
+
+
+def _team_owners(events: List[WriteEvent]) -> set:
+    return {e.owner_id for e in events if e.model is models.Team and e.owner_id is not None}
+
+async def _invalidate_user_teams(events: List[WriteEvent]) -> None:
+    for owner_id in _team_owners(events):
+        await TeamService.get_user_teams.invalidate(user_id=owner_id)
+
+def _invalidate_user_teams_sync(events: List[WriteEvent]) -> None:
+    for owner_id in _team_owners(events):
+        TeamService.get_user_teams.invalidate_sync(user_id=owner_id)
+
+register_write_listener(_invalidate_user_teams, _invalidate_user_teams_sync)
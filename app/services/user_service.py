@@ -5,7 +5,8 @@
 from typing import Optional
 from sqlalchemy.orm import Session
 from app import models, schemas
-from app.core.security import get_password_hash, verify_password
+from app.cache.principal import principal_cache
+from app.core.security import password_hasher
 
 class UserService:
     """用户服务类"""
@@ -18,7 +19,7 @@ class UserService:
         """创建新用户"""
         db_obj = models.User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await password_hasher.hash(obj_in.password),
             full_name=obj_in.full_name,
             is_active=True,
             is_superuser=False,
@@ -28,6 +29,30 @@ class UserService:
         db.refresh(db_obj)
         return db_obj
 
+    async def update(
+        self, db: Session, *, db_obj: models.User, obj_in: schemas.UserUpdate
+    ) -> models.User:
+        """更新用户信息"""
+        update_data = obj_in.dict(exclude_unset=True)
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await password_hasher.hash(password)
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.commit()
+        db.refresh(db_obj)
+        # 清除认证缓存，避免继续使用旧的用户状态
+        await principal_cache.invalidate(db_obj.id)
+        return db_obj
+
+    async def deactivate(self, db: Session, *, db_obj: models.User) -> models.User:
+        """禁用用户"""
+        db_obj.is_active = False
+        db.commit()
+        db.refresh(db_obj)
+        await principal_cache.invalidate(db_obj.id)
+        return db_obj
+
     async def authenticate(
         self, db: Session, *, email: str, password: str
     ) -> Optional[models.User]:
@@ -35,8 +60,15 @@ class UserService:
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not verified:
             return None
+        # 哈希成本配置变化时，登录成功后透明地重新哈希
+        if new_hash:
+            user.hashed_password = new_hash
+            db.commit()
         return user
 
     async def is_active(self, user: models.User) -> bool:
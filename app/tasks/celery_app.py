@@ -9,20 +9,55 @@ Celery应用配置模块
 """
 
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
+from app.db.session import engine_registry
 
 celery = Celery(
     "social-media-manager",
     broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
+    backend=settings.REDIS_URL,
+    include=["app.tasks.content", "app.tasks.devices"]
 )
 
 # 任务路由配置
 celery.conf.task_routes = {
     'app.tasks.content.*': {'queue': 'content'},
-    'app.tasks.analytics.*': {'queue': 'analytics'}
+    'app.tasks.analytics.*': {'queue': 'analytics'},
+    'app.tasks.devices.*': {'queue': 'devices'}
+}
+
+# 周期任务 (celery beat)
+celery.conf.beat_schedule = {
+    'flush-device-heartbeats': {
+        'task': 'app.tasks.devices.flush_heartbeats',
+        'schedule': settings.HEARTBEAT_FLUSH_INTERVAL,
+        'options': {'expires': settings.HEARTBEAT_FLUSH_INTERVAL},
+    },
+    'sweep-device-presence': {
+        'task': 'app.tasks.devices.sweep_presence',
+        'schedule': settings.PRESENCE_SWEEP_INTERVAL,
+        'options': {'expires': settings.PRESENCE_SWEEP_INTERVAL},
+    },
+    'rollup-device-metrics': {
+        'task': 'app.tasks.devices.rollup_device_metrics',
+        'schedule': settings.DEVICE_METRICS_ROLLUP_INTERVAL,
+        'options': {'expires': settings.DEVICE_METRICS_ROLLUP_INTERVAL},
+    },
+    'prune-device-metrics': {
+        'task': 'app.tasks.devices.prune_device_metrics',
+        'schedule': 3600.0,
+    },
 }
 
 # 任务重试设置
 celery.conf.task_acks_late = True
-celery.conf.task_reject_on_worker_lost = True 
\ No newline at end of file
+celery.conf.task_reject_on_worker_lost = True
+
+@worker_process_init.connect
+def configure_worker_engines(**kwargs):
+    """worker子进程使用worker角色的连接池配置"""
+    engine_registry.configure("worker")
+    # 注册写入事件监听，worker中的写入同样更新资源版本号(ETag)，并使模型缓存失效、广播给API进程
+    import app.cache.etag  # noqa: F401
+    import app.cache.model_caches  # noqa: F401
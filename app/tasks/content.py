@@ -11,8 +11,17 @@ from typing import Dict, Any
 from app.tasks.celery_app import celery
 from app.db.session import SessionLocal
 from app import models
+from app.core.events import WriteEvent, record_writes
 from app.platforms.factory import PlatformFactory
 
+# 处于这些状态的内容不会再次发布
+_IN_PROGRESS_STATUSES = ("publishing", "published")
+
+def _record_status_change(db, content_id: int) -> None:
+    """批量UPDATE不经过ORM对象，手动登记写入，提交后更新ETag版本号并使内容缓存失效"""
+    user_id = db.query(models.Content.user_id).filter_by(id=content_id).scalar()
+    record_writes(db, [WriteEvent(models.Content, content_id, user_id, "update")])
+
 def execute_platform_publish(content: models.Content) -> Dict[str, Any]:
     """
     执行平台内容发布
@@ -25,13 +34,19 @@ def publish_content(self, content_id: int) -> Dict[str, Any]:
     """发布内容到社交平台"""
     db = SessionLocal()
     try:
+        # 原子地把状态改为发布中，重复投递的任务在这里被跳过
+        claimed = db.query(models.Content).filter(
+            models.Content.id == content_id,
+            models.Content.status.notin_(_IN_PROGRESS_STATUSES)
+        ).update({"status": "publishing"}, synchronize_session=False)
+        if claimed:
+            _record_status_change(db, content_id)
+        db.commit()
         content = db.query(models.Content).filter_by(id=content_id).first()
         if not content:
             return {"status": "failed", "error": "Content not found"}
-            
-        # 更新状态
-        content.status = "publishing"
-        db.commit()
+        if not claimed:
+            return {"status": "skipped", "reason": f"Content is {content.status}"}
         
         # 执行发布
         result = execute_platform_publish(content)
@@ -43,6 +58,14 @@ def publish_content(self, content_id: int) -> Dict[str, Any]:
         return {"status": "success", "result": result}
         
     except Exception as e:
+        # 恢复为失败状态，重试时才能重新占用
+        db.rollback()
+        reverted = db.query(models.Content).filter_by(id=content_id, status="publishing").update(
+            {"status": "failed"}, synchronize_session=False
+        )
+        if reverted:
+            _record_status_change(db, content_id)
+        db.commit()
         self.retry(exc=e, countdown=60)  # 1分钟后重试
         
     finally:
@@ -0,0 +1,49 @@
+"""
+设备任务模块
+
+处理与设备相关的周期任务：
+1. 心跳批量写回
+2. 心跳超时的设备标记为离线
+3. 设备指标汇总和过期清理
+"""
+
+from typing import Dict, Any
+from app.tasks.celery_app import celery
+from app.db.session import PostgresSessionLocal, SessionLocal
+from app.cache.heartbeat import heartbeat_buffer
+from app.services.device_metrics_service import DeviceMetricsService
+
+device_metrics_service = DeviceMetricsService()
+
+@celery.task(ignore_result=True)
+def flush_heartbeats() -> Dict[str, Any]:
+    """把Redis中缓冲的设备心跳批量写回数据库"""
+    db = SessionLocal()
+    try:
+        return {"status": "success", "flushed": heartbeat_buffer.flush(db)}
+    finally:
+        db.close()
+
+@celery.task(ignore_result=True)
+def sweep_presence() -> Dict[str, Any]:
+    """把心跳超时的设备标记为离线，离线状态由下一次 flush_heartbeats 写回数据库"""
+    return {"status": "success", "expired": heartbeat_buffer.expire()}
+
+@celery.task(ignore_result=True)
+def rollup_device_metrics() -> Dict[str, Any]:
+    """把原始设备指标聚合为1分钟、1小时汇总"""
+    db = PostgresSessionLocal()
+    try:
+        result = device_metrics_service.rollup(db)
+        return {"status": "success", "minutes": result["minutes"], "hours": result["hours"]}
+    finally:
+        db.close()
+
+@celery.task(ignore_result=True)
+def prune_device_metrics() -> Dict[str, Any]:
+    """删除超过保留期的设备指标"""
+    db = PostgresSessionLocal()
+    try:
+        return {"status": "success", **device_metrics_service.prune(db)}
+    finally:
+        db.close()
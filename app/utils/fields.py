@@ -0,0 +1,51 @@
+"""
+稀疏字段工具模块
+
+列表接口的 fields= 参数 (如 fields=id,title,status,scheduled_time)：
+1. SQL只查询需要的列 (load_only)
+2. 响应只序列化需要的字段
+3. id 始终返回，游标分页依赖它
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple, Type
+from pydantic import AliasChoices, BaseModel, ConfigDict, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """解析 fields 参数，未传时返回None，包含未知字段时抛出ValueError"""
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - schema.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    names.add("id")
+    # 按schema中的字段顺序，保证相同字段集合对应同一个序列化器
+    return tuple(name for name in schema.model_fields if name in names)
+
+def _column_name(schema: Type[BaseModel], name: str) -> str:
+    alias = schema.model_fields[name].validation_alias
+    if isinstance(alias, AliasChoices):
+        return alias.choices[0]
+    if isinstance(alias, str):
+        return alias
+    return name
+
+def load_only_fields(model: Type, schema: Type[BaseModel], fields: Tuple[str, ...]):
+    """只加载字段对应的列，schema中没有对应列的字段使用默认值"""
+    columns = {attr.key for attr in inspect(model).column_attrs}
+    names = (_column_name(schema, name) for name in fields)
+    return load_only(*[getattr(model, name) for name in names if name in columns])
+
+@lru_cache(maxsize=None)
+def fields_schema(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """只包含指定字段的schema，未指定字段时返回原schema"""
+    if fields is None:
+        return schema
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
@@ -0,0 +1,31 @@
+"""
+JSON Patch 工具模块
+
+生成 RFC 6902 格式的差异，用于设备配置的增量同步：
+1. 对象逐个键比较，只输出新增(add)、删除(remove)、修改(replace)的路径
+2. 数组作为整体比较，有变化时整体替换
+3. 路径中的 ~ 和 / 按规范转义为 ~0 和 ~1
+"""
+
+from typing import Any, Dict, List
+
+def _escape(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """生成把 old 变为 new 的操作列表，两者相同时返回空列表"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                operations.append({"op": "add", "path": child, "value": value})
+            else:
+                operations.extend(make_patch(old[key], value, child))
+        return operations
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
@@ -0,0 +1,44 @@
+"""
+分页工具模块
+
+列表接口的游标分页：
+1. 游标为不透明字符串，内部保存上一页最后一条记录的id
+2. 按 id > 游标 查询，不再随页数增加而扫描被跳过的行
+3. skip/limit 分页继续保留，兼容旧客户端
+"""
+
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+def encode_cursor(last_id: int) -> str:
+    """生成游标"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """解析游标，格式错误时抛出ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(data["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """根据本页数据生成下一页游标，没有下一页时返回None"""
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1].id)
+
+def apply_keyset(stmt, model, cursor: Optional[str], skip: int, limit: int):
+    """为查询加上分页条件
+
+    stmt 可以是 select() 语句或 Query 对象
+    """
+    stmt = stmt.order_by(model.id)
+    if cursor:
+        stmt = stmt.filter(model.id > decode_cursor(cursor))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
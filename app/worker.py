@@ -1,7 +1,8 @@
 from typing import Dict, Any
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine_registry
 from app import models
 
 # 初始化Celery应用，使用Redis作为broker和backend
@@ -11,6 +12,11 @@ celery = Celery(
     backend=settings.REDIS_URL
 )
 
+@worker_process_init.connect
+def configure_worker_engines(**kwargs):
+    """worker子进程使用worker角色的连接池配置"""
+    engine_registry.configure("worker")
+
 @celery.task
 def execute_social_task(task_id: int) -> Dict[str, Any]:
     """执行社交媒体任务
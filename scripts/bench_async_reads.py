@@ -0,0 +1,72 @@
+"""
+异步读基准
+
+在相同并发下比较读取账号列表的延迟分布 (p50 / p99)：
+1. 同步会话，在线程池中执行 (原来的实现)
+2. 异步会话 (AccountService.get_user_accounts)
+
+需要可访问的MySQL，读取 USER_ID 的账号列表
+运行: python -m scripts.bench_async_reads
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app import models
+from app.db.session import AsyncMySQLSessionLocal, MySQLSessionLocal, engine_registry
+from app.services.account_service import AccountService
+
+USER_ID = 1
+REQUESTS = 2000
+
+account_service = AccountService()
+
+def sync_read() -> list:
+    db = MySQLSessionLocal()
+    try:
+        stmt = select(models.Account).where(models.Account.user_id == USER_ID).order_by(models.Account.id).limit(100)
+        return db.execute(stmt).scalars().all()
+    finally:
+        db.close()
+
+async def threadpool_path() -> None:
+    await run_in_threadpool(sync_read)
+
+async def async_path() -> None:
+    async with AsyncMySQLSessionLocal() as db:
+        await account_service.get_user_accounts(db, user_id=USER_ID)
+
+async def run(func: Callable[[], Awaitable[None]], concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await func()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*[one() for _ in range(REQUESTS)])
+    return latencies
+
+async def main():
+    # 预热连接池
+    await run(threadpool_path, 10)
+    await run(async_path, 10)
+    for concurrency in (10, 50, 200):
+        for name, func in (("threadpool", threadpool_path), ("async", async_path)):
+            started = time.perf_counter()
+            latencies = await run(func, concurrency)
+            elapsed = time.perf_counter() - started
+            percentiles = statistics.quantiles(latencies, n=100)
+            print(
+                f"c={concurrency:<4} {name:<11} {REQUESTS / elapsed:8.0f} req/s  "
+                f"p50 {percentiles[49]:7.2f} ms  p99 {percentiles[98]:7.2f} ms"
+            )
+    await engine_registry.dispose_async()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+分页基准
+
+比较内容列表第1页和第1000页的查询耗时：
+1. skip/limit 分页 (OFFSET 随页数增加而扫描被跳过的行)
+2. 游标分页 (按 id > 游标 查询)
+
+需要可访问的MySQL，USER_ID 至少有 PAGES * LIMIT 条内容
+运行: python -m scripts.bench_pagination
+"""
+
+import asyncio
+import time
+from sqlalchemy import select
+from app import models
+from app.db.session import AsyncMySQLSessionLocal, engine_registry
+from app.services.content_service import ContentService
+from app.utils.pagination import encode_cursor
+
+USER_ID = 1
+LIMIT = 20
+PAGES = (1, 1000)
+NUMBER = 20
+
+content_service = ContentService()
+
+async def cursor_for(db, page: int):
+    """第 page 页的游标 (上一页最后一条的id)，第1页没有游标"""
+    if page == 1:
+        return None
+    result = await db.execute(
+        select(models.Content.id)
+        .where(models.Content.user_id == USER_ID)
+        .order_by(models.Content.id)
+        .offset((page - 1) * LIMIT - 1)
+        .limit(1)
+    )
+    last_id = result.scalar()
+    if last_id is None:
+        raise SystemExit(f"用户 {USER_ID} 的内容不足 {page} 页")
+    return encode_cursor(last_id)
+
+async def timed(func) -> float:
+    started = time.perf_counter()
+    for _ in range(NUMBER):
+        await func()
+    return (time.perf_counter() - started) / NUMBER * 1000
+
+async def main():
+    async with AsyncMySQLSessionLocal() as db:
+        for page in PAGES:
+            cursor = await cursor_for(db, page)
+            offset_ms = await timed(lambda: content_service.get_user_contents(
+                db, user_id=USER_ID, skip=(page - 1) * LIMIT, limit=LIMIT
+            ))
+            cursor_ms = await timed(lambda: content_service.get_user_contents(
+                db, user_id=USER_ID, limit=LIMIT, cursor=cursor
+            ))
+            print(f"page {page:>5}  offset {offset_ms:8.2f} ms  cursor {cursor_ms:8.2f} ms")
+    await engine_registry.dispose_async()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+密码哈希基准
+
+并发登录时比较两种方式的哈希吞吐和事件循环延迟：
+1. 在事件循环中直接调用 bcrypt (原来的实现)
+2. PasswordHasher 有界执行器
+
+同时每10ms采样一次 PasswordHasher 的排队深度，事件循环延迟为定时器的实际唤醒延迟
+
+运行: python -m scripts.bench_password_hashing
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+from app.core.security import PasswordHasherBusy, get_password_hash, password_hasher, verify_password
+
+CONCURRENCY = (10, 50, 200)
+HASHED = get_password_hash("benchmark-password")
+
+async def inline_verify() -> None:
+    verify_password("benchmark-password", HASHED)
+
+async def hasher_verify() -> None:
+    await password_hasher.verify("benchmark-password", HASHED)
+
+async def monitor(stop: asyncio.Event, lags: List[float], depths: List[int]) -> None:
+    interval = 0.01
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+        depths.append(password_hasher.pending)
+
+async def run(func: Callable[[], Awaitable[None]], concurrency: int) -> None:
+    lags: List[float] = []
+    depths: List[int] = []
+    stop = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor(stop, lags, depths))
+    rejected = 0
+
+    async def one() -> None:
+        nonlocal rejected
+        try:
+            await func()
+        except PasswordHasherBusy:
+            rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor_task
+
+    lag_p99 = statistics.quantiles(lags, n=100)[98] if len(lags) > 1 else (lags[0] if lags else 0.0)
+    print(
+        f"c={concurrency:<4} {func.__name__:<14} {(concurrency - rejected) / elapsed:7.1f} hash/s  "
+        f"rejected {rejected:<4} max queue {max(depths, default=0):<4} "
+        f"loop lag p99 {lag_p99:8.2f} ms"
+    )
+
+async def main():
+    for concurrency in CONCURRENCY:
+        for func in (inline_verify, hasher_verify):
+            await run(func, concurrency)
+    print(password_hasher.stats())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+响应序列化基准
+
+比较 FastAPI 默认路径 (校验 + jsonable_encoder + json.dumps)
+与 model_response (一次校验 + pydantic 直接输出JSON) 序列化 schemas.Content 列表的耗时
+
+运行: python -m scripts.bench_responses
+"""
+
+import json
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from app import schemas
+from app.core.responses import model_response, response_adapter
+from app.schemas.common import ResponseModel
+
+def make_rows(n: int) -> list:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i, user_id=1, account_id=1, title=f"post {i}", content="x" * 4000,
+            content_type="text", platform="tiktok", status="published",
+            scheduled_time=None, published_at=now, meta_data={"lang": "zh"},
+            created_at=now, updated_at=now
+        )
+        for i in range(n)
+    ]
+
+def default_path(rows: list) -> bytes:
+    adapter = response_adapter(List[schemas.Content])
+    body = ResponseModel(code=200, msg="获取成功", data=rows).model_dump()
+    model = adapter.validate_python(body, from_attributes=True)
+    return json.dumps(jsonable_encoder(model), ensure_ascii=False).encode()
+
+def fast_path(rows: list) -> bytes:
+    return model_response(List[schemas.Content], rows).body
+
+def main():
+    for n in (100, 1000):
+        rows = make_rows(n)
+        for name, func in (("default", default_path), ("model_response", fast_path)):
+            number = 20
+            seconds = timeit.timeit(lambda: func(rows), number=number)
+            print(f"{n:>5} items  {name:<15} {seconds / number * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
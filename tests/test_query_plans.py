@@ -0,0 +1,87 @@
+"""
+服务查询的执行计划检查
+
+对服务层的主要查询执行 EXPLAIN，确认都能使用索引 (type 不为 ALL)
+需要按 alembic 迁移到最新版本的MySQL，MYSQL_DATABASE_URI 连接不上时跳过
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import models
+from app.core.config import settings
+from app.utils.pagination import apply_keyset, encode_cursor
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine(settings.MYSQL_DATABASE_URI)
+    try:
+        conn = engine.connect()
+    except SQLAlchemyError as e:
+        pytest.skip(f"MySQL不可用: {e}")
+    yield conn
+    conn.close()
+    engine.dispose()
+
+
+def _explain(connection, stmt):
+    sql = stmt.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True})
+    return connection.execute(text(f"EXPLAIN {sql}")).mappings().all()
+
+
+_now = datetime(2024, 1, 1)
+
+# 与各服务中的查询同形 (过滤条件、排序、分页)
+QUERIES = {
+    "account_service.get_user_accounts": apply_keyset(
+        select(models.Account).where(models.Account.user_id == 1), models.Account, None, 0, 100
+    ),
+    "account_service.get_user_accounts(platform)": apply_keyset(
+        select(models.Account).where(models.Account.user_id == 1, models.Account.platform == "twitter"),
+        models.Account, None, 0, 100
+    ),
+    "account_service.get_account_by_platform": select(models.Account).where(
+        models.Account.user_id == 1,
+        models.Account.platform == "twitter",
+        models.Account.platform_id == "123"
+    ),
+    "content_service.get_user_contents": apply_keyset(
+        select(models.Content).where(models.Content.user_id == 1), models.Content, None, 0, 100
+    ),
+    "content_service.get_user_contents(cursor)": apply_keyset(
+        select(models.Content).where(models.Content.user_id == 1),
+        models.Content, encode_cursor(1000), 0, 100
+    ),
+    "content_service.get_max_content_id": select(func.max(models.Content.id)).where(
+        models.Content.user_id == 1
+    ),
+    "content_service.stream_user_contents": select(models.Content.__table__).where(
+        models.Content.user_id == 1, models.Content.id > 0
+    ).order_by(models.Content.id),
+    "analytics_service.get_account_analytics": select(models.Content).where(
+        models.Content.account_id == 1,
+        models.Content.created_at.between(_now - timedelta(days=30), _now)
+    ),
+    "analytics_service.get_summary": select(
+        models.Account.platform, func.count(models.Account.id)
+    ).where(models.Account.user_id == 1).group_by(models.Account.platform),
+    "team_service.get_user_teams": select(models.Team).where(models.Team.owner_id == 1),
+    "task_service.get_user_tasks": apply_keyset(
+        select(models.Task).where(models.Task.user_id == 1), models.Task, encode_cursor(10), 0, 100
+    ),
+    "device_service.get_user_devices": select(models.Device).where(
+        models.Device.user_id == 1
+    ).order_by(models.Device.id),
+    "device_service.get_device": select(models.Device).where(models.Device.device_id == "device-1"),
+}
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_uses_index(connection, name):
+    for row in _explain(connection, QUERIES[name]):
+        assert row["type"] != "ALL", f"{name} 全表扫描 {row['table']}: {dict(row)}"